@@ -45,9 +45,34 @@ header {visibility: hidden;}
 
 # ----------------------------
 # DB INIT (VERY IMPORTANT)
+# Once per process, not on every rerun: it creates tables and
+# triggers, runs backfills and touches every clinic shard
 # ----------------------------
 from src.core.db import init_db
-init_db()
+
+
+@st.cache_resource
+def init_db_once():
+    init_db()
+
+
+init_db_once()
+
+# ----------------------------
+# METRICS (no-op unless CDS_METRICS=1)
+# ----------------------------
+from src.core.metrics import span, start_exporters
+start_exporters()
+
+# ----------------------------
+# PROFILER (no-op unless CDS_PROFILE=1)
+# ----------------------------
+from src.core.profiling import profile_rerun
+
+# ----------------------------
+# MEMORY ACCOUNTING (no-op unless CDS_MEMPROFILE=1)
+# ----------------------------
+from src.core.memory import track_page
 
 # ----------------------------
 # UI IMPORTS
@@ -92,17 +117,31 @@ with st.sidebar:
             st.session_state.page = "Home"
             st.rerun()
 
+# ----------------------------
+# CLINIC SHARD (single database unless CDS_SHARDS is set)
+# Logged-in doctors use the clinic set at login (never the URL);
+# patient kiosks open ?clinic=<shard>
+# ----------------------------
+from src.core.shards import route, use_shard
+if "doctor" in st.session_state:
+    shard = route(st.session_state.get("shard"))
+else:
+    shard = route(st.query_params.get("clinic"))
+
 # ----------------------------
 # PAGE ROUTING
 # ----------------------------
 if st.session_state.page == "Home":
-    landing_page()
+    with use_shard(shard), profile_rerun("home"), span("page.home"), track_page("home"):
+        landing_page()
 
 elif st.session_state.page == "Patient Assessment":
-    patient_form()
+    with use_shard(shard), profile_rerun("patient_form"), span("page.patient_form"), track_page("patient_form"):
+        patient_form()
 
 elif st.session_state.page == "Doctor Login":
-    login_page()
+    with use_shard(shard), profile_rerun("login"), span("page.login"), track_page("login"):
+        login_page()
 
 elif st.session_state.page == "Doctor Dashboard":
     if "doctor" not in st.session_state:
@@ -110,4 +149,5 @@ elif st.session_state.page == "Doctor Dashboard":
         st.session_state.page = "Doctor Login"
         st.rerun()
     else:
-        doctor_dashboard()
+        with use_shard(shard), profile_rerun("doctor_dashboard"), span("page.doctor_dashboard"), track_page("doctor_dashboard"):
+            doctor_dashboard()
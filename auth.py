@@ -1,6 +1,38 @@
+import os
+
+from src.core.shards import DEFAULT_SHARD, SHARDED, SHARDS
+
+# Doctors who may see operational panels (comma-separated); none by default
+ADMINS = {u.strip() for u in os.getenv("CDS_ADMINS", "").split(",") if u.strip()}
+
+# Clinic (database shard) of each doctor: "doctor1:north,doctor2:south"
+USER_SHARDS = dict(
+    pair.split(":", 1)
+    for pair in os.getenv("CDS_USER_SHARDS", "").split(",") if ":" in pair
+)
+
+
 def authenticate(username, password):
     DOCTORS = {
         "doctor1": "pass123",
         "doctor2": "admin123"
     }
     return username in DOCTORS and DOCTORS[username] == password
+
+
+def is_admin(username):
+    return username in ADMINS
+
+
+def user_shard(username):
+    """
+    Clinic a doctor works in. Admins without a mapping start on the
+    default clinic (they may switch); other unmapped doctors get
+    None and cannot log in while sharding is on.
+    """
+    if not SHARDED:
+        return DEFAULT_SHARD
+    if username in USER_SHARDS:
+        # A mapping to an unknown clinic is refused, not rerouted
+        return USER_SHARDS[username] if USER_SHARDS[username] in SHARDS else None
+    return DEFAULT_SHARD if is_admin(username) else None
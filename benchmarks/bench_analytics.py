@@ -0,0 +1,195 @@
+"""
+Population analytics: DuckDB over Parquet vs SQLite / pandas
+
+1. Writes --rows seeded synthetic assessments straight to a Parquet
+   snapshot (chunked, so generation itself stays within memory) and
+   times every prebuilt report on DuckDB.
+2. At --baseline-rows, loads the same data into SQLite and compares
+   one report three ways: SQLite GROUP BY on the live table, pandas
+   over the whole table, DuckDB over a fresh snapshot (including the
+   snapshot cost and how long it holds the database).
+
+    python -m benchmarks.bench_analytics --rows 10000000 --baseline-rows 1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("CDS_MODEL_RELOAD_SECONDS", "0")
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import generate_patients, populate_db, score
+from src.core import analytics, archive, db
+
+RESULTS_DIR = "benchmarks/results"
+
+REPORT = "risk_by_age_band"
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _timed(fn, repeat=3):
+    """
+    (cold ms, best warm ms, result)
+    """
+    start = time.perf_counter()
+    result = fn()
+    cold = (time.perf_counter() - start) * 1000
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        warm.append((time.perf_counter() - start) * 1000)
+    return cold, min(warm), result
+
+
+def write_parquet(path, rows, chunk, seed):
+    schema = archive.SCHEMAS[archive.RECORDS]
+    with pq.ParquetWriter(path, schema, compression=archive.COMPRESSION) as writer:
+        for i, start in enumerate(range(0, rows, chunk)):
+            df = score(generate_patients(min(chunk, rows - start), seed=seed + i))
+            df["id"] = range(start + 1, start + len(df) + 1)
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            print(f"  generated {start + len(df):,} rows")
+
+
+# =====================================================
+# DUCKDB AT SCALE
+# =====================================================
+def bench_reports(workdir, rows, chunk, seed):
+    path = os.path.join(workdir, "records.parquet")
+
+    start = time.perf_counter()
+    write_parquet(path, rows, chunk, seed)
+    results = {
+        "rows": rows,
+        "generate_s": time.perf_counter() - start,
+        "parquet_mb": os.path.getsize(path) / 1e6,
+    }
+
+    rss_before = _peak_rss_mb()
+    con = analytics.connect(snapshot_path=path, archive_dir=os.path.join(workdir, "none"))
+    for name in analytics.REPORTS:
+        cold, warm, df = _timed(lambda: analytics.run_report(name, con=con))
+        results[f"duckdb.{name}"] = {"cold_ms": cold, "warm_ms": warm, "groups": len(df)}
+        print(f"duckdb  {name:<22} {rows:>12,} rows  cold {cold:>8.0f} ms  warm {warm:>8.0f} ms")
+    con.close()
+    results["duckdb.peak_rss_growth_mb"] = _peak_rss_mb() - rss_before
+
+    return results
+
+
+# =====================================================
+# BASELINES ON THE LIVE TABLE
+# =====================================================
+def bench_baseline(workdir, rows, seed):
+    db.DB_PATH = os.path.join(workdir, "clinical.db")
+    analytics.ANALYTICS_DIR = os.path.join(workdir, "analytics")
+
+    db.init_db()
+    populate_db(db.DB_PATH, score(generate_patients(rows, seed=seed)))
+
+    results = {"rows": rows}
+    age_band = db.COHORT_DIMENSIONS["age_band"].format(row="r")
+
+    def sqlite_groupby():
+        conn = db.get_connection()
+        try:
+            return conn.execute(f"""
+                SELECT substr(r.created_at, 1, 4), {age_band}, COUNT(*),
+                       AVG(r.risk_probability),
+                       AVG(CASE WHEN r.risk_category = 'High' THEN 1.0 ELSE 0.0 END),
+                       AVG(r.hba1c)
+                FROM patient_records r GROUP BY 1, 2
+            """).fetchall()
+        finally:
+            conn.close()
+
+    def pandas_groupby():
+        conn = db.get_connection()
+        try:
+            df = pd.read_sql("SELECT * FROM patient_records", conn)
+        finally:
+            conn.close()
+        df["year"] = df["created_at"].str[:4]
+        df["age_band"] = pd.cut(
+            df["age"], [-1, 29, 39, 49, 59, 69, 200],
+            labels=["18-29", "30-39", "40-49", "50-59", "60-69", "70+"]
+        )
+        df["high"] = df["risk_category"] == "High"
+        return df.groupby(["year", "age_band"], observed=True).agg(
+            n=("id", "size"), mean_risk=("risk_probability", "mean"),
+            high_risk_share=("high", "mean"), mean_hba1c=("hba1c", "mean"),
+        )
+
+    # The live table is locked only while SQLite copies it
+    live, copy = db.get_connection(), sqlite3.connect(":memory:")
+    start = time.perf_counter()
+    live.backup(copy, pages=-1)
+    results["snapshot.db_lock_ms"] = (time.perf_counter() - start) * 1000
+    live.close()
+    copy.close()
+
+    start = time.perf_counter()
+    analytics.snapshot()
+    results["snapshot.total_ms"] = (time.perf_counter() - start) * 1000
+
+    con = analytics.connect()
+    for label, fn in (
+        ("sqlite", sqlite_groupby),
+        ("pandas", pandas_groupby),
+        ("duckdb", lambda: analytics.run_report(REPORT, con=con)),
+    ):
+        rss_before = _peak_rss_mb()
+        cold, warm, _ = _timed(fn)
+        results[f"{label}.{REPORT}"] = {
+            "cold_ms": cold, "warm_ms": warm,
+            "peak_rss_growth_mb": _peak_rss_mb() - rss_before,
+        }
+        print(f"{label:<7} {REPORT:<22} {rows:>12,} rows  cold {cold:>8.0f} ms  warm {warm:>8.0f} ms")
+    con.close()
+
+    print(f"snapshot: {results['snapshot.total_ms']:.0f} ms total, "
+          f"database held {results['snapshot.db_lock_ms']:.0f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analytics engine benchmark")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk", type=int, default=1_000_000)
+    parser.add_argument("--baseline-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cds-analytics-")
+    try:
+        results = {
+            "scale": bench_reports(workdir, args.rows, args.chunk, args.seed),
+            # Run last: pandas' peak memory would mask DuckDB's
+            "baseline": bench_baseline(workdir, args.baseline_rows, args.seed),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"analytics-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Results written to {out}")
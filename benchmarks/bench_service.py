@@ -0,0 +1,151 @@
+"""
+Scoring service throughput: micro-batched vs one-at-a-time
+
+Starts the ASGI service twice under uvicorn (batch window on, then
+CDS_API_BATCH_WINDOW_MS=0 behaviour) and drives POST /v1/risk from
+concurrent keep-alive clients.
+
+    python -m benchmarks.bench_service --clients 1 16 64 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from datetime import datetime
+
+os.environ.setdefault("CDS_MODEL_RELOAD_SECONDS", "0")
+
+import uvicorn
+
+from benchmarks.synthetic import generate_patients, to_patient_data
+from src.api.service import create_app
+
+RESULTS_DIR = "benchmarks/results"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app):
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.01)
+    return server, port
+
+
+# =====================================================
+# CLIENT
+# =====================================================
+async def _client(port, bodies, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    for body in bodies:
+        request = (
+            f"POST /v1/risk HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode() + body
+
+        start = time.perf_counter()
+        writer.write(request)
+
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(
+            int(line.split(b":")[1])
+            for line in head.split(b"\r\n")
+            if line.lower().startswith(b"content-length")
+        )
+        payload = await reader.readexactly(length)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(payload.decode())
+
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _drive(port, bodies, clients, per_client):
+    latencies = []
+    start = time.perf_counter()
+
+    await asyncio.gather(*(
+        _client(port, bodies[i * per_client:(i + 1) * per_client], latencies)
+        for i in range(clients)
+    ))
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_per_s": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+def run(client_counts, per_client, window_ms, seed):
+    patients = to_patient_data(
+        generate_patients(max(client_counts) * per_client, seed=seed)
+    )
+    bodies = [json.dumps(p).encode() for p in patients]
+
+    results = {}
+    for mode, window in (("batched", window_ms), ("unbatched", 0)):
+        app = create_app(batch_window_ms=window)
+        server, port = _start_server(app)
+
+        try:
+            for clients in client_counts:
+                # Warm up the connection path and model
+                asyncio.run(_drive(port, bodies, 1, 10))
+
+                stats = asyncio.run(_drive(port, bodies, clients, per_client))
+                if app.batcher is not None and app.batcher.batches:
+                    stats["mean_batch_size"] = app.batcher.scored / app.batcher.batches
+                    app.batcher.batches = app.batcher.scored = 0
+
+                results[f"{mode}.clients_{clients}"] = stats
+                print(
+                    f"{mode:<10} clients={clients:<4} "
+                    f"{stats['throughput_per_s']:>8.0f} req/s  "
+                    f"p50={stats['p50_ms']:.2f} ms  p95={stats['p95_ms']:.2f} ms"
+                    + (f"  batch={stats['mean_batch_size']:.1f}" if "mean_batch_size" in stats else "")
+                )
+        finally:
+            server.should_exit = True
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring service throughput benchmark")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    results = run(args.clients, args.requests, args.window_ms, args.seed)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"service-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(out, "w") as f:
+        json.dump({"window_ms": args.window_ms, "results": results}, f, indent=2)
+    print(f"📊 Results written to {out}")
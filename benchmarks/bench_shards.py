@@ -0,0 +1,120 @@
+"""
+Write throughput: one database vs per-clinic shards
+
+Starts --writers processes that each insert assessments through
+insert_patient_record (one transaction per visit, as the patient
+form does) for --seconds. With --shards N the writers are spread
+round-robin over N clinic databases; with 1 they all share one
+file and queue behind its write lock.
+
+    python -m benchmarks.bench_shards --writers 8 --shards 1 4 8
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import generate_patients, score
+from src.core import db, shards
+
+RESULTS_DIR = "benchmarks/results"
+
+
+def _configure(workdir, n_shards):
+    """
+    Point src.core.shards / db at workdir with n_shards clinics
+    (inherited by the forked writers)
+    """
+    shards.SHARDS = [f"clinic{i}" for i in range(n_shards)]
+    shards.SHARDED = n_shards > 1
+    shards.DEFAULT_SHARD = shards.SHARDS[0]
+    shards.SHARD_DIR = os.path.join(workdir, "shards")
+    db.DB_PATH = os.path.join(workdir, "clinical.db")
+    db.GLOBAL_DB_PATH = os.path.join(shards.SHARD_DIR, "global.db")
+    db.init_db()
+
+
+def _writer(shard, records, seconds, results):
+    inserted = errors = 0
+    deadline = time.perf_counter() + seconds
+    with shards.use_shard(shard):
+        while time.perf_counter() < deadline:
+            try:
+                db.insert_patient_record(records[inserted % len(records)])
+                inserted += 1
+            except sqlite3.OperationalError:
+                # "database is locked" after the 5 s busy timeout
+                errors += 1
+    results.put((shard, inserted, errors))
+
+
+def run(n_shards, writers, seconds, records):
+    workdir = tempfile.mkdtemp(prefix="cds-shards-")
+    try:
+        _configure(workdir, n_shards)
+
+        results = mp.get_context("fork").Queue()
+        procs = [
+            mp.get_context("fork").Process(
+                target=_writer,
+                args=(shards.SHARDS[i % n_shards], records, seconds, results)
+            )
+            for i in range(writers)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        rows = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        inserted = sum(r[1] for r in rows)
+        stored = sum(
+            len(df) for df in shards.fan_out(lambda: db.load_records()).values()
+        )
+        assert stored == inserted, (stored, inserted)
+
+        return {
+            "shards": n_shards,
+            "writers": writers,
+            "inserted": inserted,
+            "lock_errors": sum(r[2] for r in rows),
+            "inserts_per_s": inserted / elapsed,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded write throughput benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    df = score(generate_patients(1_000, seed=args.seed))
+    records = df[db.RECORD_COLUMNS].to_dict("records")
+
+    results = []
+    for n in args.shards:
+        r = run(n, args.writers, args.seconds, records)
+        results.append(r)
+        print(f"{n:>3} shard(s)  {r['writers']} writers  "
+              f"{r['inserts_per_s']:>9.0f} inserts/s  {r['lock_errors']} lock error(s)")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"shards-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(out, "w") as f:
+        json.dump({"cpus": os.cpu_count(), "runs": results}, f, indent=2)
+    print(f"📊 Results written to {out}")
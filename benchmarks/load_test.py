@@ -0,0 +1,279 @@
+"""
+Headless concurrent-session load harness
+
+Drives app.py through Streamlit's AppTest, one AppTest per simulated
+browser session, from a thread pool. Patients step through the
+language, personal and medical steps of patient_form; doctors log in
+and load doctor_dashboard. Gemini is replaced by a local stub with a
+configurable delay, so runs are offline and repeatable.
+
+    python -m benchmarks.load_test --patients 20 --doctors 5 --iterations 3
+
+Reports p50/p95/p99 per step, errors by kind (e.g. SQLite lock
+timeouts) and throughput as JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+APP_PATH = os.path.abspath("app.py")
+RESULTS_DIR = "benchmarks/results"
+
+
+# =====================================================
+# GEMINI STUB
+# =====================================================
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGeminiClient:
+    """
+    Stands in for genai.Client: same call shape, fixed latency
+    """
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.models = self
+
+    def generate_content(self, model, contents):
+        time.sleep(self.delay_s)
+        return _StubResponse("Stub explanation for load testing.")
+
+
+# =====================================================
+# RECORDING
+# =====================================================
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def step(self, name, at, action):
+        started = time.perf_counter()
+        try:
+            action()
+            at.run()
+        except Exception as exc:
+            self._error(name, exc)
+            raise
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.timings[name].append(elapsed)
+
+        # Exceptions raised inside the script are rendered, not raised
+        for element in at.exception:
+            self._error(name, element.message)
+
+    def _error(self, step, error):
+        text = str(error)
+        if "database is locked" in text:
+            kind = "sqlite_locked"
+        elif "timed out" in text.lower() or isinstance(error, TimeoutError):
+            kind = "timeout"
+        else:
+            kind = type(error).__name__ if isinstance(error, Exception) else "script_exception"
+
+        with self._lock:
+            self.errors[f"{step}:{kind}"] += 1
+            self.error_samples.setdefault(f"{step}:{kind}", text[:500])
+
+
+def _button(at, label):
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise LookupError(f"Button not found: {label!r}")
+
+
+# =====================================================
+# SESSIONS
+# =====================================================
+def patient_session(recorder, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    recorder.step("home", at, lambda: None)
+    recorder.step("open_form", at,
+                  lambda: at.sidebar.radio[0].set_value("Patient Assessment"))
+
+    def language():
+        from src.core.i18n import ENABLED_LANGUAGES
+
+        # Single-language deployments skip the picker
+        if len(ENABLED_LANGUAGES) > 1:
+            at.main.radio[0].set_value(rng.choice(ENABLED_LANGUAGES))
+            at.main.button[0].click()
+
+    recorder.step("language", at, language)
+
+    def personal():
+        at.main.text_input[0].input(f"Load Patient {seed}")
+        at.main.text_input[1].input(f"9{rng.randrange(10**9):09d}")
+        at.main.button[0].click()
+
+    recorder.step("personal", at, personal)
+
+    def medical():
+        at.main.slider[0].set_value(rng.randint(18, 90))
+        at.main.slider[1].set_value(round(rng.uniform(15, 45), 1))
+        at.main.slider[2].set_value(round(rng.uniform(4.5, 12), 1))
+        at.main.slider[3].set_value(rng.randint(70, 300))
+        at.main.button[-1].click()
+
+    recorder.step("medical_submit", at, medical)
+
+
+def doctor_session(recorder, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    recorder.step("home", at, lambda: None)
+    recorder.step("open_login", at,
+                  lambda: at.sidebar.radio[0].set_value("Doctor Login"))
+
+    def login():
+        at.text_input[0].input("doctor1")
+        at.text_input[1].input("pass123")
+        _button(at, "Login").click()
+
+    recorder.step("login", at, login)
+    recorder.step("dashboard", at, lambda: None)
+
+    def browse():
+        if at.selectbox:
+            options = at.selectbox[0].options
+            at.selectbox[0].set_value(random.Random(seed).choice(options))
+
+    recorder.step("dashboard_browse", at, browse)
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(patients, doctors, iterations, llm_delay_s, timeout, workers=None):
+    from src.core import llm_engine
+
+    llm_engine._client = StubGeminiClient(llm_delay_s)
+
+    recorder = Recorder()
+    jobs = (
+        [(patient_session, i) for i in range(patients)]
+        + [(doctor_session, i) for i in range(doctors)]
+    ) * iterations
+    random.Random(0).shuffle(jobs)
+
+    completed = failed = 0
+
+    def run_job(job):
+        fn, seed = job
+        try:
+            fn(recorder, seed, timeout)
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or (patients + doctors)) as pool:
+        for ok in pool.map(run_job, jobs):
+            completed += ok
+            failed += not ok
+    wall = time.perf_counter() - started
+
+    steps = {
+        name: {
+            "count": len(values),
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "p99_ms": _percentile(values, 99),
+            "max_ms": max(values),
+        }
+        for name, values in sorted(recorder.timings.items())
+    }
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "patients": patients,
+            "doctors": doctors,
+            "iterations": iterations,
+            "llm_delay_s": llm_delay_s,
+            "cpu_count": os.cpu_count(),
+        },
+        "wall_s": wall,
+        "sessions_completed": completed,
+        "sessions_failed": failed,
+        "sessions_per_s": completed / wall if wall else None,
+        "steps_per_s": sum(s["count"] for s in steps.values()) / wall if wall else None,
+        "steps": steps,
+        "errors": dict(recorder.errors),
+        "error_samples": recorder.error_samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test")
+    parser.add_argument("--patients", type=int, default=10,
+                        help="Concurrent patient sessions")
+    parser.add_argument("--doctors", type=int, default=2,
+                        help="Concurrent doctor sessions")
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--llm-delay", type=float, default=0.5,
+                        help="Stub Gemini latency in seconds")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="Per-rerun AppTest timeout in seconds")
+    parser.add_argument("--db", help="SQLite file to use (default: fresh temp database)")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.db:
+        os.environ["CDS_DB_PATH"] = args.db
+    else:
+        workdir = tempfile.mkdtemp(prefix="cds-load-")
+        os.environ["CDS_DB_PATH"] = os.path.join(workdir, "clinical.db")
+    os.environ.setdefault("CDS_MODEL_RELOAD_SECONDS", "0")
+
+    try:
+        report = run(args.patients, args.doctors, args.iterations,
+                     args.llm_delay, args.timeout)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, s in report["steps"].items():
+        print(f"{name:18s} n={s['count']:4d}  p50={s['p50_ms']:8.1f}  "
+              f"p95={s['p95_ms']:8.1f}  p99={s['p99_ms']:8.1f} ms")
+    print(f"Sessions: {report['sessions_completed']} ok, {report['sessions_failed']} failed, "
+          f"{report['sessions_per_s']:.2f}/s")
+    print(f"Errors: {report['errors'] or 'none'}")
+    print(f"📊 Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark suite
+
+Measures the hot paths of the app on seeded synthetic data and
+writes machine-readable JSON, so runs can be compared before a
+deploy.
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 10000 100000 --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# The explain benchmark measures the rule-based fallback, not Gemini
+os.environ.pop("GEMINI_API_KEY", None)
+os.environ.setdefault("CDS_MODEL_RELOAD_SECONDS", "0")
+
+from benchmarks.synthetic import generate_patients, populate_db, score, to_patient_data
+from src.core import db
+from src.core.genai_explainer import explain
+from src.core.pdf_report import generate_pdf
+from src.core.risk_engine import compute_risk, compute_risk_batch, current_model
+
+RESULTS_DIR = "benchmarks/results"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SCORING_BATCH_SIZES = [100, 1000, 10_000]
+
+
+def _timings(fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples_ms, items_per_call=1):
+    samples_ms = sorted(samples_ms)
+    mean = statistics.fmean(samples_ms)
+    return {
+        "calls": len(samples_ms),
+        "mean_ms": mean,
+        "p50_ms": samples_ms[len(samples_ms) // 2],
+        "p95_ms": samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))],
+        "min_ms": samples_ms[0],
+        "throughput_per_s": items_per_call * 1000 / mean if mean else None,
+    }
+
+
+# =====================================================
+# BENCHMARKS
+# =====================================================
+def bench_scoring(patients, repeat):
+    results = {}
+    bundle = current_model()
+
+    single = patients[0]
+    results["compute_risk.single"] = _summary(
+        _timings(lambda: compute_risk(single, bundle), repeat)
+    )
+
+    for batch_size in SCORING_BATCH_SIZES:
+        if batch_size > len(patients):
+            continue
+        batch = patients[:batch_size]
+        results[f"compute_risk_batch.{batch_size}"] = _summary(
+            _timings(lambda: compute_risk_batch(batch, bundle), max(5, repeat // 20)),
+            items_per_call=len(batch)
+        )
+
+    return results
+
+
+def bench_explain(patients, repeat):
+    patient = patients[0]
+    prob, risk, _, _ = compute_risk(patient)
+
+    return {
+        f"explain.fallback.{audience}": _summary(_timings(
+            lambda: explain(patient, risk, prob, audience=audience), repeat
+        ))
+        for audience in ("patient", "clinician")
+    }
+
+
+def bench_pdf(df, repeat):
+    record = df.iloc[0].to_dict()
+    record["patient_id"] = "BENCH-PDF"
+    explanation = "Benchmark explanation text. " * 20
+
+    samples = _timings(lambda: generate_pdf(record, explanation), repeat, warmup=1)
+    os.remove("reports/BENCH-PDF_report.pdf")
+    return {"generate_pdf": _summary(samples)}
+
+
+def bench_dashboard(df_all, sizes, repeat):
+    results = {}
+    version = current_model().version
+
+    for n in sizes:
+        workdir = tempfile.mkdtemp(prefix="cds-bench-")
+        # Restored below so later benchmarks touch the real path again
+        saved_path, db.DB_PATH = db.DB_PATH, os.path.join(workdir, "clinical.db")
+
+        try:
+            db.init_db()
+
+            started = time.perf_counter()
+            populate_db(db.DB_PATH, df_all.iloc[:n])
+            results[f"db.bulk_insert.{n}"] = _summary(
+                [(time.perf_counter() - started) * 1000], items_per_call=n
+            )
+
+            # Full dashboard load (records table + patient picker)
+            results[f"dashboard.load_records.{n}"] = _summary(
+                _timings(lambda: db.load_records(version), max(3, repeat // 100), warmup=1),
+                items_per_call=n
+            )
+
+            # One patient's history, exactly as the trend view loads it
+            # (rescored values, archived visits merged in)
+            patient_id = df_all.iloc[0]["patient_id"]
+            results[f"dashboard.patient_history.{n}"] = _summary(
+                _timings(lambda: db.load_patient_history(patient_id, version),
+                         max(5, repeat // 10))
+            )
+        finally:
+            db.DB_PATH = saved_path
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+# =====================================================
+# RUN / COMPARE
+# =====================================================
+def _meta(args):
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        commit = None
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model_version": current_model().version,
+        "seed": args.seed,
+        "sizes": args.sizes,
+        "repeat": args.repeat,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    Print mean-time ratios against a baseline run.
+    Returns the names of benchmarks slower than 1 + tolerance.
+    """
+    regressions = []
+
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        ratio = result["mean_ms"] / base["mean_ms"] if base["mean_ms"] else float("inf")
+        flag = "⚠️" if ratio > 1 + tolerance else "  "
+        print(f"{flag} {name:45s} {base['mean_ms']:10.3f} -> {result['mean_ms']:10.3f} ms  x{ratio:.2f}")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown before a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    # Enough patients for the largest scoring batch, whatever --sizes
+    df = score(generate_patients(max(*args.sizes, *SCORING_BATCH_SIZES), seed=args.seed))
+    patients = to_patient_data(df.iloc[:max(SCORING_BATCH_SIZES)])
+
+    results = {}
+    results.update(bench_scoring(patients, args.repeat))
+    results.update(bench_explain(patients, args.repeat))
+    results.update(bench_pdf(df, max(5, args.repeat // 20)))
+    results.update(bench_dashboard(df, args.sizes, args.repeat))
+
+    report = {"meta": _meta(args), "results": results}
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Seeded synthetic patient generator
+
+Produces rows matching the patient_records schema, with inputs drawn
+from the ranges patient_form allows. Same seed, same patients.
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from src.core.db import RECORD_COLUMNS, record_to_patient_data
+from src.core.risk_engine import compute_risk_batch, current_model
+
+GENDERS = ["Male", "Female"]
+SMOKING = ["never", "former", "occasional", "current"]
+LANGUAGES = ["English", "Hindi"]
+
+# Ranges from the patient_form sliders
+AGE_RANGE = (18, 90)
+BMI_RANGE = (10.0, 50.0)
+HBA1C_RANGE = (4.0, 15.0)
+GLUCOSE_RANGE = (70, 300)
+
+
+def generate_patients(n, seed=42, visits_per_patient=3, days=730):
+    """
+    DataFrame of n assessments (patient_records columns + created_at).
+    Patients get on average visits_per_patient assessments spread
+    over the last `days` days.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_patients = max(1, n // visits_per_patient)
+    patient_no = rng.integers(0, n_patients, n)
+
+    # Clinically plausible centres, clipped to the form ranges
+    age = np.clip(rng.normal(45, 15, n), *AGE_RANGE).astype(int)
+    bmi = np.clip(rng.normal(27, 5, n), *BMI_RANGE).round(1)
+    hba1c = np.clip(rng.normal(5.8, 1.1, n), *HBA1C_RANGE).round(1)
+    glucose = np.clip(rng.normal(130, 35, n), *GLUCOSE_RANGE).astype(int)
+
+    created = (
+        pd.Timestamp("2026-01-01")
+        - pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s")
+    )
+
+    df = pd.DataFrame({
+        "patient_id": [f"PID-SYN-{i:07d}" for i in patient_no],
+        "name": [f"Patient {i}" for i in patient_no],
+        "mobile": (6_000_000_000 + patient_no * 7919 % 4_000_000_000).astype(str),
+        "language": rng.choice(LANGUAGES, n, p=[0.7, 0.3]),
+        "gender": rng.choice(GENDERS, n),
+        "age": age,
+        "hypertension": (rng.random(n) < 0.25).astype(int),
+        "heart_disease": (rng.random(n) < 0.08).astype(int),
+        "smoking_history": rng.choice(SMOKING, n, p=[0.6, 0.2, 0.1, 0.1]),
+        "bmi": bmi,
+        "hba1c": hba1c,
+        "glucose": glucose,
+        "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+    return df
+
+
+def to_patient_data(df):
+    """
+    Model-input dicts (as patient_form builds them) for each row
+    """
+    return [record_to_patient_data(row) for row in df.to_dict("records")]
+
+
+def score(df, bundle=None, chunk_size=100_000):
+    """
+    Fill risk_probability / risk_category / model_version
+    with the batch scorer
+    """
+    bundle = bundle or current_model()
+    probs, categories = [], []
+
+    for start in range(0, len(df), chunk_size):
+        p, c = compute_risk_batch(to_patient_data(df.iloc[start:start + chunk_size]), bundle)
+        probs.extend(np.round(p, 3))
+        categories.extend(c)
+
+    df = df.copy()
+    df["risk_probability"] = probs
+    df["risk_category"] = categories
+    df["model_version"] = bundle.version
+    return df
+
+
+def populate_db(db_path, df, chunk_size=50_000):
+    """
+    Bulk-insert scored rows into an initialized database
+    """
+    columns = RECORD_COLUMNS + ["created_at"]
+    conn = sqlite3.connect(db_path)
+
+    with conn:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size][columns]
+            conn.executemany(
+                f"INSERT INTO patient_records ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                chunk.itertuples(index=False, name=None)
+            )
+
+    conn.close()
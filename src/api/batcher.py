@@ -0,0 +1,74 @@
+"""
+Async micro-batching for model calls
+
+Requests arriving within a short window are gathered and scored with
+one compute_risk_batch call; each caller awaits its own row. A batch
+is flushed when the window closes or when it reaches max_batch.
+"""
+
+import asyncio
+
+from src.core.risk_engine import compute_risk_batch, current_model
+
+
+class MicroBatcher:
+    """
+    window_ms: how long the first request in a batch waits for company
+    max_batch: flush immediately once this many requests are queued
+
+    Runs on one event loop. The vectorized call itself is short
+    (well under a millisecond for a few hundred rows), so it is made
+    on the loop rather than handed to a thread.
+    """
+
+    def __init__(self, window_ms=2.0, max_batch=256):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+
+        self._pending = []
+        self._timer = None
+
+        self.batches = 0
+        self.scored = 0
+
+    async def submit(self, record):
+        """
+        Returns (probability, risk category, model version)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # One snapshot per batch: every row is scored by the same model
+        bundle = current_model()
+
+        try:
+            probs, categories = compute_risk_batch([r for r, _ in batch], bundle)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.scored += len(batch)
+
+        for (_, future), prob, category in zip(batch, probs, categories):
+            if not future.done():
+                future.set_result((float(prob), category, bundle.version))
@@ -0,0 +1,292 @@
+"""
+Headless scoring service (ASGI)
+
+JSON endpoints for EHR / lab integrations, without the Streamlit UI:
+
+    POST /v1/risk           patient -> probability, category, model version
+    POST /v1/risk/batch     {"patients": [...]} -> one result per patient
+    POST /v1/severity       {"risk_probability": p} -> severity level
+    POST /v1/next-steps     {"risk_category": "High"} -> clinical next steps
+    POST /v1/explanation    patient (+ "audience") -> rule-based explanation
+    POST /v1/assess         patient -> all of the above in one call
+    GET  /health            liveness + live model version
+
+Single-patient requests go through a MicroBatcher, so concurrent
+clients share one vectorized model call. Set CDS_API_BATCH_WINDOW_MS=0
+to score one request at a time instead.
+
+    python -m src.api.service --port 8000
+    uvicorn src.api.service:app --port 8000
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+
+from src.api.batcher import MicroBatcher
+from src.core.banding import RISK_CATEGORY_BANDS
+from src.core.decision_support import next_steps
+from src.core.feature_encoder import CATEGORY_VOCAB, NUMERIC_COLS
+from src.core.genai_explainer import rule_based_explanation
+from src.core.metrics import span
+from src.core.risk_engine import compute_risk, compute_risk_batch, current_model
+from src.core.severity_engine import get_severity
+
+BATCH_WINDOW_MS = float(os.getenv("CDS_API_BATCH_WINDOW_MS", "2"))
+MAX_BATCH = int(os.getenv("CDS_API_MAX_BATCH", "256"))
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_PATIENTS = 10_000
+
+RISK_CATEGORIES = tuple(band["label"] for band in RISK_CATEGORY_BANDS.bands)
+AUDIENCES = ("patient", "clinician")
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.errors = errors
+
+
+# =====================================================
+# VALIDATION
+# =====================================================
+def _is_number(value):
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    )
+
+
+def validate_patient(data, where="body"):
+    """
+    Patient dict in the shape compute_risk expects, or RequestError(422)
+    """
+    if not isinstance(data, dict):
+        raise RequestError(422, f"{where} must be a JSON object")
+
+    errors = []
+
+    for col in NUMERIC_COLS:
+        if not _is_number(data.get(col)):
+            errors.append(f"{where}.{col}: required number")
+
+    for col in ("hypertension", "heart_disease"):
+        if _is_number(data.get(col)) and data[col] not in (0, 1):
+            errors.append(f"{where}.{col}: must be 0 or 1")
+
+    # Categories outside the model vocabulary (e.g. the form's
+    # "occasional" smoker) are accepted and encode as all zeros,
+    # exactly as they do in the app
+    for col in CATEGORY_VOCAB:
+        if not isinstance(data.get(col), str) or not data[col]:
+            errors.append(f"{where}.{col}: required string")
+
+    if errors:
+        raise RequestError(422, "Invalid patient", errors)
+
+    return {
+        **{col: data[col] for col in NUMERIC_COLS},
+        **{col: data[col] for col in CATEGORY_VOCAB},
+    }
+
+
+def _audience(data):
+    audience = data.get("audience", "clinician")
+    if audience not in AUDIENCES:
+        raise RequestError(422, f"audience must be one of {list(AUDIENCES)}")
+    return audience
+
+
+# =====================================================
+# APP
+# =====================================================
+def create_app(batch_window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+    batcher = MicroBatcher(batch_window_ms, max_batch) if batch_window_ms > 0 else None
+
+    async def score(patient):
+        if batcher is not None:
+            return await batcher.submit(patient)
+
+        bundle = current_model()
+        prob, risk, _, _ = compute_risk(patient, bundle)
+        return float(prob), risk, bundle.version
+
+    def risk_payload(prob, risk, version):
+        return {
+            "risk_probability": prob,
+            "risk_category": risk,
+            "model_version": version,
+        }
+
+    # -----------------------------
+    # HANDLERS
+    # -----------------------------
+    async def health(_):
+        return {"status": "ok", "model_version": current_model().version}
+
+    async def risk(body):
+        return risk_payload(*await score(validate_patient(body)))
+
+    async def risk_batch(body):
+        patients = body.get("patients") if isinstance(body, dict) else None
+        if not isinstance(patients, list) or not patients:
+            raise RequestError(422, "patients must be a non-empty list")
+        if len(patients) > MAX_BATCH_PATIENTS:
+            raise RequestError(422, f"At most {MAX_BATCH_PATIENTS} patients per request")
+
+        patients = [validate_patient(p, f"patients[{i}]") for i, p in enumerate(patients)]
+
+        bundle = current_model()
+        probs, categories = compute_risk_batch(patients, bundle)
+        return {
+            "model_version": bundle.version,
+            "results": [
+                {"risk_probability": float(p), "risk_category": c}
+                for p, c in zip(probs, categories)
+            ],
+        }
+
+    async def severity(body):
+        prob = body.get("risk_probability") if isinstance(body, dict) else None
+        if not _is_number(prob) or not 0.0 <= prob <= 1.0:
+            raise RequestError(422, "risk_probability must be a number in [0, 1]")
+        return get_severity(prob)
+
+    async def steps(body):
+        category = body.get("risk_category") if isinstance(body, dict) else None
+        if category not in RISK_CATEGORIES:
+            raise RequestError(422, f"risk_category must be one of {list(RISK_CATEGORIES)}")
+        return {"risk_category": category, "next_steps": next_steps(category)}
+
+    async def explanation(body):
+        patient = validate_patient(body)
+        audience = _audience(body)
+        prob, risk, version = await score(patient)
+        return {
+            **risk_payload(prob, risk, version),
+            "audience": audience,
+            "explanation": rule_based_explanation(patient, risk, prob, audience),
+        }
+
+    async def assess(body):
+        patient = validate_patient(body)
+        audience = _audience(body)
+        prob, risk, version = await score(patient)
+        return {
+            **risk_payload(prob, risk, version),
+            "severity": get_severity(prob),
+            "next_steps": next_steps(risk),
+            "explanation": rule_based_explanation(patient, risk, prob, audience),
+        }
+
+    routes = {
+        "/health": ("GET", health),
+        "/v1/risk": ("POST", risk),
+        "/v1/risk/batch": ("POST", risk_batch),
+        "/v1/severity": ("POST", severity),
+        "/v1/next-steps": ("POST", steps),
+        "/v1/explanation": ("POST", explanation),
+        "/v1/assess": ("POST", assess),
+    }
+
+    # -----------------------------
+    # ASGI PLUMBING
+    # -----------------------------
+    async def read_body(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise RequestError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def send_json(send, status, payload):
+        body = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"].rstrip("/") or "/"
+
+        try:
+            if path not in routes:
+                raise RequestError(404, "Not found")
+
+            method, handler = routes[path]
+            if scope["method"] != method:
+                raise RequestError(405, f"Use {method}")
+
+            body = None
+            if method == "POST":
+                raw = await read_body(receive)
+                try:
+                    body = json.loads(raw or b"null")
+                except ValueError:
+                    raise RequestError(400, "Body is not valid JSON")
+
+            with span(f"api{path}"):
+                payload = await handler(body)
+            status = 200
+
+        except RequestError as exc:
+            status = exc.status
+            payload = {"error": exc.message}
+            if exc.errors:
+                payload["errors"] = exc.errors
+
+        except Exception:
+            logger.exception("Unhandled error on %s", path)
+            status, payload = 500, {"error": "Internal error"}
+
+        await send_json(send, status, payload)
+
+    app.batcher = batcher
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Headless scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,208 @@
+"""
+Rising-risk alerts
+
+Compares every new visit with the same patient's previous visit using
+SQLite window functions (LAG over patient_id, created_at) and stores
+the visits whose risk probability, HbA1c or BMI rose sharply in
+risk_alerts, newest first, for the dashboard worklist.
+
+Incremental: only rows inserted since the last run are evaluated
+(checkpoint in job_progress). The window still sees each touched
+patient's earlier visits, found through idx_records_patient, so
+the whole table is never scanned. Deltas use the scores stored at
+assessment time.
+
+A patient whose earlier visits were all moved to the archive is
+compared with their latest archived visit, kept in SQLite as
+archived_last_visit by the archival job.
+
+The patient form runs an update after storing each assessment (only
+that visit is evaluated); the dashboard just reads risk_alerts.
+
+Run once:   python -m src.core.alerts
+Rebuild:    python -m src.core.alerts --rebuild
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from src.core.db import get_connection, init_db
+from src.core.metrics import timed
+
+JOB = "risk_alerts"
+
+# Rise between consecutive visits that raises an alert
+RISK_DELTA = float(os.getenv("CDS_ALERT_RISK_DELTA", "0.15"))
+HBA1C_DELTA = float(os.getenv("CDS_ALERT_HBA1C_DELTA", "0.5"))
+BMI_DELTA = float(os.getenv("CDS_ALERT_BMI_DELTA", "2.0"))
+
+_DETECT_SQL = """
+WITH touched AS (
+    SELECT DISTINCT patient_id FROM patient_records WHERE id > :last_id
+),
+history AS (
+    SELECT id, patient_id, created_at, risk_probability, hba1c, bmi, 1 AS hot
+    FROM patient_records
+    WHERE patient_id IN (SELECT patient_id FROM touched)
+    UNION ALL
+    SELECT record_id, patient_id, created_at, risk_probability, hba1c, bmi, 0
+    FROM archived_last_visit
+    WHERE patient_id IN (SELECT patient_id FROM touched)
+),
+visits AS (
+    SELECT
+        r.id, r.patient_id, r.created_at, r.hot,
+        r.risk_probability, r.hba1c, r.bmi,
+        LAG(r.id) OVER w AS prev_id,
+        LAG(r.created_at) OVER w AS prev_created_at,
+        LAG(r.risk_probability) OVER w AS prev_risk,
+        LAG(r.hba1c) OVER w AS prev_hba1c,
+        LAG(r.bmi) OVER w AS prev_bmi
+    FROM history r
+    WINDOW w AS (PARTITION BY r.patient_id ORDER BY r.created_at, r.id)
+),
+deltas AS (
+    SELECT
+        id, patient_id, prev_id, created_at, risk_probability,
+        julianday(created_at) - julianday(prev_created_at) AS days_between,
+        risk_probability - prev_risk AS risk_delta,
+        hba1c - prev_hba1c AS hba1c_delta,
+        bmi - prev_bmi AS bmi_delta
+    FROM visits
+    WHERE hot AND id > :last_id AND prev_id IS NOT NULL
+)
+INSERT OR REPLACE INTO risk_alerts (
+    record_id, patient_id, prev_record_id, created_at, days_between,
+    risk_probability, risk_delta, hba1c_delta, bmi_delta,
+    risk_slope_30d, hba1c_slope_30d, bmi_slope_30d, reasons
+)
+SELECT
+    id, patient_id, prev_id, created_at, days_between,
+    risk_probability, risk_delta, hba1c_delta, bmi_delta,
+    -- Same-day revisits count as one day apart
+    risk_delta * 30.0 / MAX(days_between, 1.0),
+    hba1c_delta * 30.0 / MAX(days_between, 1.0),
+    bmi_delta * 30.0 / MAX(days_between, 1.0),
+    rtrim(
+        CASE WHEN risk_delta >= :risk THEN 'risk,' ELSE '' END ||
+        CASE WHEN hba1c_delta >= :hba1c THEN 'hba1c,' ELSE '' END ||
+        CASE WHEN bmi_delta >= :bmi THEN 'bmi,' ELSE '' END,
+        ','
+    )
+FROM deltas
+WHERE risk_delta >= :risk OR hba1c_delta >= :hba1c OR bmi_delta >= :bmi
+"""
+
+
+def _progress(conn):
+    """
+    (checkpointed last_id, current MAX(id) of patient_records)
+    """
+    row = conn.execute(
+        "SELECT last_id FROM job_progress WHERE job = ?", (JOB,)
+    ).fetchone()
+    max_id = conn.execute("SELECT MAX(id) FROM patient_records").fetchone()[0]
+    return (row[0] if row else 0), max_id
+
+
+@timed("alerts.update")
+def update_alerts(conn=None):
+    """
+    Evaluate visits inserted since the last run.
+    Returns the number of new alerts.
+    """
+    own = conn is None
+    conn = conn or get_connection()
+
+    try:
+        # Plain read first: nothing new means no write lock at all
+        last_id, max_id = _progress(conn)
+        if max_id is None or max_id <= last_id:
+            return 0
+
+        with conn:
+            # Serialize concurrent updaters on the checkpoint
+            conn.execute("BEGIN IMMEDIATE")
+
+            last_id, max_id = _progress(conn)
+            if max_id is None or max_id <= last_id:
+                return 0
+
+            # rowcount is not reported for statements starting with WITH
+            before = conn.total_changes
+            conn.execute(_DETECT_SQL, {
+                "last_id": last_id,
+                "risk": RISK_DELTA,
+                "hba1c": HBA1C_DELTA,
+                "bmi": BMI_DELTA,
+            })
+            created = conn.total_changes - before
+
+            conn.execute(
+                """
+                INSERT INTO job_progress (job, last_id, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(job) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    updated_at = excluded.updated_at
+                """,
+                (JOB, max_id)
+            )
+    finally:
+        if own:
+            conn.close()
+
+    return created
+
+
+def rebuild_alerts():
+    """
+    Recompute every alert from scratch (e.g. after changing thresholds)
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM risk_alerts")
+            conn.execute("DELETE FROM job_progress WHERE job = ?", (JOB,))
+        return update_alerts(conn)
+    finally:
+        conn.close()
+
+
+@timed("alerts.load")
+def load_alerts(page=0, page_size=25):
+    """
+    (one page of alerts newest first, total alert count)
+    """
+    conn = get_connection()
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM risk_alerts").fetchone()[0]
+        df = pd.read_sql(
+            """
+            SELECT patient_id, created_at, days_between, risk_probability,
+                   risk_delta, hba1c_delta, bmi_delta,
+                   risk_slope_30d, hba1c_slope_30d, bmi_slope_30d, reasons
+            FROM risk_alerts
+            ORDER BY created_at DESC, record_id DESC
+            LIMIT ? OFFSET ?
+            """,
+            conn,
+            params=(page_size, page * page_size)
+        )
+    finally:
+        conn.close()
+
+    return df, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update rising-risk alerts")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Drop and recompute all alerts")
+    args = parser.parse_args()
+
+    init_db()
+    created = rebuild_alerts() if args.rebuild else update_alerts()
+    print(f"🚨 {created} alert(s) written")
@@ -0,0 +1,302 @@
+"""
+Population analytics (DuckDB)
+
+Ad-hoc cohort queries run on DuckDB over Parquet, never on the live
+SQLite table, so they neither block the app's writer nor pull every
+record into pandas:
+
+- snapshot(): copies the database with SQLite's backup API in one
+  step (a brief read lock), then exports patient_records from the
+  copy to data/analytics/patient_records.parquet at leisure
+- queries see the snapshot plus the monthly archive
+  (src/core/archive.py) through one `records` view; the archive
+  boundary recorded with the snapshot keeps the two disjoint
+- with clinic shards (src/core/shards.py) every shard has its own
+  snapshot and archive, and `records` spans all of them with a
+  `shard` column
+
+DuckDB scans columnar, vectorized and multi-threaded, spilling to
+disk above CDS_ANALYTICS_MEMORY_LIMIT.
+
+    python -m src.core.analytics snapshot
+    python -m src.core.analytics report risk_by_age_band --start 2024-01-01
+    python -m src.core.analytics sql "SELECT gender, COUNT(*) FROM records GROUP BY 1"
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core import archive
+from src.core.db import COHORT_DIMENSIONS, get_connection, init_db
+from src.core.metrics import timed
+from src.core.shards import SHARDS, current_shard, shard_dir, use_shard
+
+ANALYTICS_DIR = os.getenv("CDS_ANALYTICS_DIR", "data/analytics")
+THREADS = int(os.getenv("CDS_ANALYTICS_THREADS", "0"))   # 0 = all cores
+MEMORY_LIMIT = os.getenv("CDS_ANALYTICS_MEMORY_LIMIT", "1GB")
+
+SNAPSHOT_CHUNK = 100_000
+
+
+def snapshot_file(shard=None):
+    return os.path.join(shard_dir(ANALYTICS_DIR, shard), "patient_records.parquet")
+
+
+def snapshot_meta_file(shard=None):
+    return os.path.join(shard_dir(ANALYTICS_DIR, shard), "patient_records.json")
+
+
+# =====================================================
+# SNAPSHOT
+# =====================================================
+def _export(src, out_path):
+    """
+    Stream patient_records from `src` into one zstd Parquet file
+    """
+    schema = archive.SCHEMAS[archive.RECORDS]
+    cur = src.execute(f"SELECT {', '.join(schema.names)} FROM patient_records ORDER BY id")
+
+    rows = 0
+    with pq.ParquetWriter(out_path, schema, compression=archive.COMPRESSION) as writer:
+        while True:
+            batch = cur.fetchmany(SNAPSHOT_CHUNK)
+            if not batch:
+                break
+            columns = list(zip(*batch))
+            # SQLite columns are loosely typed: cast to the archive schema
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col).cast(field.type) for col, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows += len(batch)
+    return rows
+
+
+@timed("analytics.snapshot")
+def snapshot():
+    """
+    Refresh the current shard's Parquet snapshot. Returns its metadata.
+    """
+    out_dir = shard_dir(ANALYTICS_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        copy_path = os.path.join(tmp, "snapshot.db")
+
+        live = get_connection()
+        copy = sqlite3.connect(copy_path)
+        try:
+            # pages=-1: one step, so concurrent writes cannot restart it
+            live.backup(copy, pages=-1)
+        finally:
+            live.close()
+
+        try:
+            # Rows archived before the copy are only in the archive;
+            # the snapshot holds everything from this day on
+            row = copy.execute(
+                "SELECT value FROM app_settings WHERE key = ?",
+                (archive.ARCHIVED_BEFORE_KEY,)
+            ).fetchone()
+            parquet_tmp = os.path.join(tmp, "patient_records.parquet")
+            rows = _export(copy, parquet_tmp)
+        finally:
+            copy.close()
+
+        meta = {
+            "rows": rows,
+            "archived_before": row[0] if row else "",
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+        meta_path = snapshot_meta_file()
+        os.replace(parquet_tmp, snapshot_file())
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    return meta
+
+
+def snapshot_info(shard=None):
+    meta_path = snapshot_meta_file(shard)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+# =====================================================
+# QUERY ENGINE
+# =====================================================
+def _sql_list(paths):
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _shard_parts(shard, parquet_path, archive_dir, meta):
+    """
+    SELECTs over one shard's snapshot and archive
+    """
+    label = "'" + shard.replace("'", "''") + "' AS shard"
+
+    parts = []
+    if os.path.exists(parquet_path):
+        parts.append(f"SELECT *, {label} FROM read_parquet({_sql_list([parquet_path])})")
+
+    archived = sorted(glob.glob(os.path.join(archive_dir, "month=*", "*.parquet")))
+    if archived:
+        # Months archived after the snapshot are in both: keep the
+        # archive only below the boundary the snapshot saw
+        where = f"WHERE created_at < '{meta['archived_before']}'" if parts and meta else ""
+        parts.append(
+            f"SELECT *, {label} FROM read_parquet({_sql_list(archived)}, hive_partitioning = false) {where}"
+        )
+    return parts
+
+
+def connect(snapshot_path=None, archive_dir=None):
+    """
+    In-memory DuckDB connection with a `records` view over the
+    snapshots and archives of every shard, or over the given
+    snapshot_path / archive_dir only
+    """
+    con = duckdb.connect()
+    if THREADS:
+        con.execute(f"SET threads = {THREADS}")
+    con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+
+    if snapshot_path or archive_dir:
+        snapshot_path = snapshot_path or snapshot_file()
+        parts = _shard_parts(
+            current_shard(),
+            snapshot_path,
+            archive_dir or archive.table_dir(archive.RECORDS),
+            snapshot_info() if snapshot_path == snapshot_file() else None,
+        )
+    else:
+        parts = []
+        for shard in SHARDS:
+            with use_shard(shard):
+                parts += _shard_parts(
+                    shard,
+                    snapshot_file(),
+                    archive.table_dir(archive.RECORDS),
+                    snapshot_info(),
+                )
+
+    if not parts:
+        con.close()
+        raise FileNotFoundError(
+            "No analytics snapshot; run python -m src.core.analytics snapshot"
+        )
+
+    con.execute(f"CREATE VIEW records AS {' UNION ALL '.join(parts)}")
+    return con
+
+
+@timed("analytics.query")
+def query(sql, params=None, con=None):
+    """
+    Run SQL against the `records` view. Returns a DataFrame.
+    """
+    own = con is None
+    con = con or connect()
+    try:
+        return con.execute(sql, params or {}).df()
+    finally:
+        if own:
+            con.close()
+
+
+# =====================================================
+# PREBUILT COHORT REPORTS
+# =====================================================
+AGE_BAND = COHORT_DIMENSIONS["age_band"].format(row="r")
+
+MEASURES = """
+    COUNT(*) AS n,
+    ROUND(AVG(r.risk_probability), 4) AS mean_risk,
+    ROUND(AVG(CASE WHEN r.risk_category = 'High' THEN 1.0 ELSE 0.0 END), 4) AS high_risk_share,
+    ROUND(AVG(r.hba1c), 2) AS mean_hba1c
+"""
+
+# Optional date range: $start <= created_at < $end (ISO dates)
+PERIOD = """
+    WHERE ($start IS NULL OR r.created_at >= $start)
+      AND ($end IS NULL OR r.created_at < $end)
+"""
+
+REPORTS = {
+    "risk_by_age_band": f"""
+        SELECT substr(r.created_at, 1, 4) AS year, {AGE_BAND} AS age_band, {MEASURES}
+        FROM records r {PERIOD}
+        GROUP BY ALL ORDER BY year, age_band
+    """,
+    "risk_by_smoking": f"""
+        SELECT substr(r.created_at, 1, 4) AS year, r.smoking_history, {MEASURES}
+        FROM records r {PERIOD}
+        GROUP BY ALL ORDER BY year, r.smoking_history
+    """,
+    "risk_by_gender": f"""
+        SELECT substr(r.created_at, 1, 4) AS year, r.gender, {MEASURES}
+        FROM records r {PERIOD}
+        GROUP BY ALL ORDER BY year, r.gender
+    """,
+    "age_smoking_gender": f"""
+        SELECT {AGE_BAND} AS age_band, r.smoking_history, r.gender, {MEASURES}
+        FROM records r {PERIOD}
+        GROUP BY ALL ORDER BY age_band, r.smoking_history, r.gender
+    """,
+    "monthly_trend": f"""
+        SELECT substr(r.created_at, 1, 7) AS month, {MEASURES},
+               ROUND(AVG(r.bmi), 2) AS mean_bmi
+        FROM records r {PERIOD}
+        GROUP BY ALL ORDER BY month
+    """,
+}
+
+
+def run_report(name, start=None, end=None, con=None):
+    """
+    One of REPORTS, optionally limited to start <= created_at < end
+    """
+    if name not in REPORTS:
+        raise KeyError(f"Unknown report {name!r}; choose from {', '.join(REPORTS)}")
+    return query(REPORTS[name], {"start": start, "end": end}, con=con)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Population analytics")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("snapshot", help="Refresh the Parquet snapshot")
+
+    rep = sub.add_parser("report", help="Run a prebuilt cohort report")
+    rep.add_argument("name", choices=sorted(REPORTS))
+    rep.add_argument("--start")
+    rep.add_argument("--end")
+
+    adhoc = sub.add_parser("sql", help="Ad-hoc SQL over the `records` view")
+    adhoc.add_argument("sql")
+
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        init_db()
+        for shard in SHARDS:
+            with use_shard(shard):
+                meta = snapshot()
+                print(f"✅ {meta['rows']} record(s) in {snapshot_file()}")
+    elif args.command == "report":
+        print(run_report(args.name, args.start, args.end).to_string(index=False))
+    else:
+        print(query(args.sql).to_string(index=False))
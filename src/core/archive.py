@@ -0,0 +1,340 @@
+"""
+Cold storage for old assessments
+
+Whole months of patient_records older than CDS_ARCHIVE_AFTER_DAYS
+(with their patient_scores rows) are moved out of SQLite into
+zstd-compressed Parquet files, one directory per month:
+
+    data/archive/patient_records/month=2024-03/part-<first id>-<last id>.parquet
+    data/archive/patient_scores/month=2024-03/part-<first id>-<last id>.parquet
+
+(under data/archive/<shard>/ when sharded by clinic).
+
+archived_months (patient_id, month) stays in SQLite, so opening a
+patient's history only reads the months that patient has, and
+patients with no archived visits never touch Parquet. Files are
+sorted by patient_id; row group statistics skip the rest of a
+month. The hot table holds at most the horizon plus one month,
+however many years are collected.
+
+Moved records keep counting in the cohort aggregates,
+load_patient_history merges archived visits back in, and each
+patient's latest archived visit stays in archived_last_visit as the
+rising-risk baseline for their next visit.
+
+Run:  python -m src.core.archive [--days 365] [--vacuum]
+"""
+
+import argparse
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.core.shards import shard_dir
+
+ARCHIVE_DIR = os.getenv("CDS_ARCHIVE_DIR", "data/archive")
+AFTER_DAYS = int(os.getenv("CDS_ARCHIVE_AFTER_DAYS", "365"))
+
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 16_384
+
+# app_settings keys: set only inside the archival delete transaction
+# (the cohort delete trigger skips those rows), and the first day
+# that is still hot
+ARCHIVING_KEY = "archiving"
+ARCHIVED_BEFORE_KEY = "archived_before"
+
+RECORDS = "patient_records"
+SCORES = "patient_scores"
+
+# Fixed schemas: every month file must agree, even when a month has
+# only NULLs in a column
+SCHEMAS = {
+    RECORDS: pa.schema([
+        ("id", pa.int64()),
+        ("patient_id", pa.string()),
+        ("name", pa.string()),
+        ("mobile", pa.string()),
+        ("language", pa.string()),
+        ("gender", pa.string()),
+        ("age", pa.int64()),
+        ("hypertension", pa.int64()),
+        ("heart_disease", pa.int64()),
+        ("smoking_history", pa.string()),
+        ("bmi", pa.float64()),
+        ("hba1c", pa.float64()),
+        ("glucose", pa.float64()),
+        ("risk_probability", pa.float64()),
+        ("risk_category", pa.string()),
+        ("model_version", pa.string()),
+        ("created_at", pa.string()),
+    ]),
+    SCORES: pa.schema([
+        ("record_id", pa.int64()),
+        ("model_version", pa.string()),
+        ("risk_probability", pa.float64()),
+        ("risk_category", pa.string()),
+        ("scored_at", pa.string()),
+    ]),
+}
+
+
+def table_dir(name):
+    return os.path.join(shard_dir(ARCHIVE_DIR), name)
+
+
+def _write(name, month, df, first_id, last_id, sort_by):
+    """
+    One Parquet file per (table, month, id range). Written under a
+    temp name and renamed, so readers never see a partial file and
+    a rerun for the same rows replaces it.
+    """
+    out_dir = os.path.join(table_dir(name), f"month={month}")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"part-{first_id}-{last_id}.parquet")
+
+    table = pa.Table.from_pandas(
+        df.sort_values(sort_by), schema=SCHEMAS[name], preserve_index=False
+    )
+    pq.write_table(
+        table, path + ".tmp",
+        compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE
+    )
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _read(name, months, expression):
+    files = [
+        os.path.join(month_dir, f)
+        for month_dir in (os.path.join(table_dir(name), f"month={m}") for m in months)
+        if os.path.isdir(month_dir)
+        for f in sorted(os.listdir(month_dir)) if f.endswith(".parquet")
+    ]
+    if not files:
+        return SCHEMAS[name].empty_table().to_pandas()
+
+    dataset = ds.dataset(files, schema=SCHEMAS[name], format="parquet")
+    return dataset.to_table(filter=expression).to_pandas()
+
+
+# =====================================================
+# READ PATH
+# =====================================================
+def archived_months(conn, patient_id):
+    """
+    Months with archived visits for a patient
+    """
+    rows = conn.execute(
+        "SELECT month FROM archived_months WHERE patient_id = ? ORDER BY month",
+        (patient_id,)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def read_patient_history(patient_id, months, model_version=None):
+    """
+    A patient's archived records from the given months, with
+    rescored_probability and rescored_category for model_version
+    (NaN where not rescored)
+    """
+    records = _read(RECORDS, months, ds.field("patient_id") == patient_id)
+
+    scores = SCHEMAS[SCORES].empty_table().to_pandas()
+    if model_version is not None and not records.empty:
+        scores = _read(
+            SCORES, months,
+            (ds.field("model_version") == model_version)
+            & ds.field("record_id").isin(records["id"].tolist())
+        )
+
+    rescored = scores[["record_id", "risk_probability", "risk_category"]].rename(columns={
+        "record_id": "id",
+        "risk_probability": "rescored_probability",
+        "risk_category": "rescored_category",
+    })
+    return records.merge(rescored, on="id", how="left")
+
+
+# =====================================================
+# ARCHIVAL JOB
+# =====================================================
+LAST_VISIT_COLUMNS = ["patient_id", "id", "created_at", "risk_probability", "hba1c", "bmi"]
+
+_UPSERT_LAST_VISIT = """
+INSERT INTO archived_last_visit
+    (patient_id, record_id, created_at, risk_probability, hba1c, bmi)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(patient_id) DO UPDATE SET
+    record_id = excluded.record_id,
+    created_at = excluded.created_at,
+    risk_probability = excluded.risk_probability,
+    hba1c = excluded.hba1c,
+    bmi = excluded.bmi
+WHERE (excluded.created_at, excluded.record_id)
+    > (archived_last_visit.created_at, archived_last_visit.record_id)
+"""
+
+
+def _last_visits(records):
+    """
+    Latest visit per patient, as archived_last_visit rows
+    """
+    latest = (
+        records.dropna(subset=["patient_id"])
+        .sort_values(["created_at", "id"])
+        .drop_duplicates("patient_id", keep="last")
+    )
+    return [
+        tuple(None if pd.isna(row[c]) else row[c] for c in LAST_VISIT_COLUMNS)
+        for row in latest[LAST_VISIT_COLUMNS].to_dict("records")
+    ]
+
+
+def _backfill_last_visits(conn):
+    """
+    Fill archived_last_visit for months archived before it existed
+    """
+    if conn.execute("SELECT 1 FROM archived_last_visit LIMIT 1").fetchone():
+        return
+
+    files = [
+        os.path.join(root, f)
+        for root, _, names in os.walk(table_dir(RECORDS))
+        for f in names if f.endswith(".parquet")
+    ]
+    if not files:
+        return
+
+    dataset = ds.dataset(files, schema=SCHEMAS[RECORDS], format="parquet")
+    records = dataset.to_table(columns=LAST_VISIT_COLUMNS).to_pandas()
+    with conn:
+        conn.executemany(_UPSERT_LAST_VISIT, _last_visits(records))
+
+
+def cutoff_month(after_days=AFTER_DAYS, today=None):
+    """
+    First day of the newest month that is entirely older than
+    after_days. Records before it are archived.
+    """
+    horizon = (today or date.today()) - timedelta(days=after_days)
+    return horizon.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_records(conn, after_days=AFTER_DAYS):
+    """
+    Move every whole month older than after_days to Parquet.
+    Returns {month: records moved}.
+    """
+    cutoff = cutoff_month(after_days).isoformat()
+    _backfill_last_visits(conn)
+
+    months = [
+        row[0] for row in conn.execute(
+            """
+            SELECT DISTINCT strftime('%Y-%m', created_at)
+            FROM patient_records
+            WHERE created_at < ?
+            ORDER BY 1
+            """,
+            (cutoff,)
+        )
+    ]
+
+    moved = {}
+    for month in months:
+        start = date.fromisoformat(f"{month}-01")
+        bounds = (start.isoformat(), _next_month(start).isoformat())
+
+        records = pd.read_sql(
+            "SELECT * FROM patient_records WHERE created_at >= ? AND created_at < ?",
+            conn, params=bounds
+        )
+        first_id, last_id = int(records["id"].min()), int(records["id"].max())
+
+        scores = pd.read_sql(
+            """
+            SELECT s.* FROM patient_scores s
+            JOIN patient_records r ON r.id = s.record_id
+            WHERE r.created_at >= ? AND r.created_at < ? AND r.id <= ?
+            """,
+            conn, params=(*bounds, last_id)
+        )
+
+        # Files first: a crash before the delete leaves rows in both
+        # places, which the read path deduplicates
+        _write(RECORDS, month, records, first_id, last_id, ["patient_id", "created_at", "id"])
+        if not scores.empty:
+            _write(SCORES, month, scores, first_id, last_id, ["record_id", "model_version"])
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO app_settings (key, value) VALUES (?, '1')",
+                (ARCHIVING_KEY,)
+            )
+            conn.execute(
+                """
+                DELETE FROM patient_scores WHERE record_id IN (
+                    SELECT id FROM patient_records
+                    WHERE created_at >= ? AND created_at < ? AND id <= ?
+                )
+                """,
+                (*bounds, last_id)
+            )
+            conn.execute(
+                "DELETE FROM patient_records WHERE created_at >= ? AND created_at < ? AND id <= ?",
+                (*bounds, last_id)
+            )
+            conn.execute("DELETE FROM app_settings WHERE key = ?", (ARCHIVING_KEY,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO archived_months (patient_id, month) VALUES (?, ?)",
+                ((pid, month) for pid in records["patient_id"].dropna().unique().tolist())
+            )
+            conn.executemany(_UPSERT_LAST_VISIT, _last_visits(records))
+            conn.execute(
+                """
+                INSERT INTO app_settings (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+                """,
+                (ARCHIVED_BEFORE_KEY, bounds[1])
+            )
+
+        moved[month] = len(records)
+
+    return moved
+
+
+if __name__ == "__main__":
+    from src.core.db import get_connection, init_db
+    from src.core.shards import SHARDS, SHARDED, use_shard
+
+    parser = argparse.ArgumentParser(description="Archive old assessments to Parquet")
+    parser.add_argument("--days", type=int, default=AFTER_DAYS,
+                        help="Keep at least this many days in SQLite")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Reclaim the freed space in the database file")
+    args = parser.parse_args()
+
+    init_db()
+    for shard in SHARDS:
+        with use_shard(shard):
+            conn = get_connection()
+            try:
+                moved = archive_records(conn, args.days)
+                for month, n in moved.items():
+                    print(f"📦 {shard + ' ' if SHARDED else ''}{month}: {n} record(s) archived")
+                if args.vacuum and moved:
+                    conn.execute("VACUUM")
+            finally:
+                conn.close()
+
+    print(f"✅ Records before {cutoff_month(args.days)} are in {ARCHIVE_DIR}")
@@ -0,0 +1,155 @@
+"""
+Risk banding tables
+
+One declarative table per banding scheme. Values are classified with
+a sorted-threshold search (np.searchsorted), so a single probability
+and an array of millions take the same code path. Bands come back as
+small integer codes; labels, colours and the other band attributes
+are looked up from the codes.
+
+Thresholds are lower bounds of the next band: with (0.3, 0.6),
+0.3 is already "Moderate".
+"""
+
+import numpy as np
+
+
+class BandingTable:
+    """
+    thresholds: sorted cut points on the probability scale
+    bands: one dict per band (len(thresholds) + 1), lowest first
+    """
+
+    def __init__(self, thresholds, bands):
+        if len(bands) != len(thresholds) + 1:
+            raise ValueError("Need exactly one more band than thresholds")
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError("Thresholds must be sorted")
+
+        self.thresholds = np.asarray(thresholds, dtype=float)
+        self.bands = tuple(bands)
+
+        self._fields = {
+            field: np.array([band[field] for band in bands], dtype=object)
+            for field in bands[0]
+        }
+
+    def codes(self, probs):
+        """
+        Band index for a probability (int) or an array (int8 array)
+        """
+        codes = np.searchsorted(self.thresholds, probs, side="right")
+        return int(codes) if np.ndim(codes) == 0 else codes.astype(np.int8)
+
+    def lookup(self, codes, field):
+        """
+        Attribute per code, e.g. lookup(codes, "color")
+        """
+        return self._fields[field][codes]
+
+    def labels(self, codes):
+        return self.lookup(codes, "label")
+
+    def colors(self, codes):
+        return self.lookup(codes, "color")
+
+    def band(self, prob):
+        """
+        Full band dict for one probability
+        """
+        return dict(self.bands[self.codes(prob)])
+
+    def label(self, prob):
+        return self.bands[self.codes(prob)]["label"]
+
+    def by_label(self, label):
+        """
+        Band dict for a label (case-insensitive), or None
+        """
+        for band in self.bands:
+            if band["label"].lower() == str(label).lower():
+                return dict(band)
+        return None
+
+
+# =====================================================
+# MODEL RISK CATEGORY (stored with each assessment)
+# =====================================================
+RISK_CATEGORY_BANDS = BandingTable(
+    thresholds=(0.3, 0.6),
+    bands=[
+        {
+            "label": "Low",
+            "color": "#16a34a",
+            "emoji": "🟢",
+            "message": "Low diabetes risk. Maintain healthy lifestyle.",
+        },
+        {
+            "label": "Moderate",
+            "color": "#f59e0b",
+            "emoji": "🟡",
+            "message": "Moderate risk detected. Lifestyle improvement advised.",
+        },
+        {
+            "label": "High",
+            "color": "#dc2626",
+            "emoji": "🔴",
+            "message": "High risk detected. Clinical follow-up recommended.",
+        },
+    ],
+)
+
+
+# =====================================================
+# SEVERITY (five levels, patient result card + API)
+# =====================================================
+SEVERITY_BANDS = BandingTable(
+    thresholds=(0.2, 0.4, 0.6, 0.8),
+    bands=[
+        {
+            "level": 0,
+            "label": "Normal",
+            "urgency": "None",
+            "action": "Maintain healthy lifestyle",
+            "color": "#22c55e",
+            "emoji": "🟢",
+            "message": "No immediate diabetes risk. Maintain healthy habits.",
+        },
+        {
+            "level": 1,
+            "label": "Mild Risk",
+            "urgency": "Low",
+            "action": "Lifestyle modification recommended",
+            "color": "#eab308",
+            "emoji": "🟡",
+            "message": "Early risk detected. Lifestyle changes recommended.",
+        },
+        {
+            "level": 2,
+            "label": "Moderate Risk",
+            "urgency": "Medium",
+            "action": "Regular monitoring & medical advice",
+            "color": "#f97316",
+            "emoji": "🟠",
+            "message": "Moderate diabetes risk. Regular monitoring advised.",
+        },
+        {
+            "level": 3,
+            "label": "High Risk",
+            "urgency": "High",
+            "action": "Doctor consultation advised",
+            "color": "#ef4444",
+            "emoji": "🔴",
+            "message": "High risk detected. Doctor consultation advised.",
+        },
+        {
+            "level": 4,
+            "label": "Critical Risk",
+            "urgency": "Critical",
+            "action": "Immediate medical attention required",
+            "color": "#7f1d1d",
+            "emoji": "🚨",
+            "message": "Critical condition. Immediate medical attention required.",
+        },
+    ],
+)
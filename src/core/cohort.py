@@ -0,0 +1,196 @@
+"""
+Clinic cohort figures
+
+Reads the pre-aggregated cohort_daily table (one row per dimension,
+day and value, kept current by triggers on patient_records), so the
+dashboard never groups the raw records. Figures use the risk scores
+stored at assessment time.
+
+clinic_summary() compares clinic shards side by side, querying
+them in parallel.
+
+Consistency check:  python -m src.core.cohort
+Rebuild:            python -m src.core.cohort --rebuild
+"""
+
+import argparse
+
+import pandas as pd
+
+from src.core.db import (
+    COHORT_DIMENSIONS,
+    COHORT_MEASURES,
+    archived_before,
+    create_cohort_aggregates,
+    get_connection,
+    init_db,
+    rebuild_cohort_aggregates,
+)
+from src.core.metrics import timed
+from src.core.shards import fan_out
+
+
+def _load(dimension, start=None, end=None):
+    """
+    cohort_daily rows for one dimension, optionally limited to
+    start <= day <= end (ISO dates)
+    """
+    where, params = ["dimension = ?"], [dimension]
+    if start:
+        where.append("day >= ?")
+        params.append(str(start))
+    if end:
+        where.append("day <= ?")
+        params.append(str(end))
+
+    conn = get_connection()
+    try:
+        return pd.read_sql(
+            f"""
+            SELECT day, value, {", ".join(COHORT_MEASURES)}
+            FROM cohort_daily
+            WHERE {" AND ".join(where)}
+            ORDER BY day
+            """,
+            conn,
+            params=params
+        )
+    finally:
+        conn.close()
+
+
+# =====================================================
+# REPORTS
+# =====================================================
+@timed("cohort.risk_counts")
+def risk_counts_by_day(start=None, end=None):
+    """
+    Assessments per day (rows) and risk category (columns)
+    """
+    df = _load("risk_category", start, end)
+    return df.pivot_table(
+        index="day", columns="value", values="n", aggfunc="sum", fill_value=0
+    )
+
+
+@timed("cohort.hba1c_by_age")
+def mean_hba1c_by_age_band(start=None, end=None):
+    """
+    Mean HbA1c and assessment count per age band
+    """
+    df = _load("age_band", start, end)
+    totals = df.groupby("value")[["n", "hba1c_n", "hba1c_sum"]].sum()
+    totals["mean_hba1c"] = totals["hba1c_sum"] / totals["hba1c_n"].where(totals["hba1c_n"] > 0)
+    return totals[["n", "mean_hba1c"]].rename_axis("age_band")
+
+
+@timed("cohort.high_risk_by_language")
+def high_risk_share_by_language(start=None, end=None):
+    """
+    Share of assessments in the High category per language
+    """
+    df = _load("language", start, end)
+    totals = df.groupby("value")[["n", "high_risk_n"]].sum()
+    totals["high_risk_share"] = totals["high_risk_n"] / totals["n"]
+    return totals.rename_axis("language")
+
+
+@timed("cohort.clinic_summary")
+def clinic_summary(start=None, end=None):
+    """
+    Assessments, High share and mean risk per clinic shard
+    """
+    def totals():
+        return _load("risk_category", start, end)[["n", "high_risk_n", "risk_sum"]].sum()
+
+    df = pd.DataFrame(fan_out(totals)).T
+    df["high_risk_share"] = df["high_risk_n"] / df["n"].where(df["n"] > 0)
+    df["mean_risk"] = df["risk_sum"] / df["n"].where(df["n"] > 0)
+    return df[["n", "high_risk_share", "mean_risk"]].rename_axis("clinic")
+
+
+# =====================================================
+# MAINTENANCE
+# =====================================================
+def rebuild():
+    """
+    Recompute cohort_daily from patient_records and reinstall the
+    triggers (e.g. after adding a dimension or measure)
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.cursor()
+            create_cohort_aggregates(cur, replace_triggers=True)
+            rebuild_cohort_aggregates(cur)
+            return cur.execute("SELECT COUNT(*) FROM cohort_daily").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def check():
+    """
+    Compare cohort_daily with a fresh GROUP BY over patient_records
+    (days not yet archived). Returns the mismatching rows.
+    """
+    cols = list(COHORT_MEASURES)
+    sums = ", ".join(
+        f"SUM({sql.format(row='r')}) AS {m}" for m, sql in COHORT_MEASURES.items()
+    )
+    expected_sql = " UNION ALL ".join(
+        f"""
+        SELECT '{dim}' AS dimension, date(r.created_at) AS day,
+               {expr.format(row="r")} AS value, {sums}
+        FROM patient_records r
+        WHERE date(r.created_at) >= :since
+        GROUP BY 2, 3
+        """
+        for dim, expr in COHORT_DIMENSIONS.items()
+    )
+
+    conn = get_connection()
+    try:
+        # One read transaction so both sides see the same rows
+        with conn:
+            conn.execute("BEGIN")
+            # Archived days have no hot rows left to compare with
+            since = archived_before(conn)
+            stored = pd.read_sql(
+                f"SELECT dimension, day, value, {', '.join(cols)} FROM cohort_daily "
+                "WHERE day >= :since",
+                conn,
+                params={"since": since}
+            )
+            expected = pd.read_sql(expected_sql, conn, params={"since": since})
+    finally:
+        conn.close()
+
+    merged = stored.merge(
+        expected, on=["dimension", "day", "value"], how="outer",
+        suffixes=("_stored", "_expected"), indicator=True
+    )
+    stored_vals = merged[[f"{m}_stored" for m in cols]].fillna(0).to_numpy()
+    expected_vals = merged[[f"{m}_expected" for m in cols]].fillna(0).to_numpy()
+
+    # Sums of REAL values may differ in the last bits
+    bad = (abs(stored_vals - expected_vals) > 1e-6 * (1 + abs(expected_vals))).any(axis=1)
+    return merged[bad | (merged["_merge"] != "both")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cohort aggregates maintenance")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute cohort_daily from patient_records")
+    args = parser.parse_args()
+
+    init_db()
+    if args.rebuild:
+        print(f"📊 {rebuild()} cohort row(s) rebuilt")
+    else:
+        mismatches = check()
+        if mismatches.empty:
+            print("✅ cohort_daily matches patient_records")
+        else:
+            print(mismatches.to_string())
+            raise SystemExit(f"❌ {len(mismatches)} mismatching cohort row(s)")
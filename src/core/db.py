@@ -1,16 +1,86 @@
+import hashlib
+import hmac
+import re
+import secrets
 import sqlite3
 import os
+import pandas as pd
 
+from src.core import archive, shards
+from src.core.metrics import timed
 
-DB_PATH = "data/clinical.db"
+
+DB_PATH = os.getenv("CDS_DB_PATH", "data/clinical.db")
+
+# Organization-wide tables (patient ID sequences, drift counts) when
+# sharded by clinic; the one database otherwise (see src/core/shards.py)
+GLOBAL_DB_PATH = os.getenv(
+    "CDS_GLOBAL_DB_PATH", os.path.join(shards.SHARD_DIR, "global.db")
+)
+
+# Secret for hashing name + mobile number; a random per-database salt is
+# generated and kept in app_settings when this is unset
+MOBILE_SALT = os.getenv("CDS_MOBILE_SALT")
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+def db_path():
+    """
+    Database file of the current shard
+    """
+    return shards.shard_path() if shards.SHARDED else DB_PATH
 
 
 def get_connection():
-    os.makedirs("data", exist_ok=True)
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    return _connect(db_path())
+
+
+def get_global_connection():
+    return _connect(GLOBAL_DB_PATH if shards.SHARDED else DB_PATH)
 
 
 def init_db():
+    """
+    Create or upgrade every shard and the global database
+    """
+    for shard in shards.SHARDS:
+        with shards.use_shard(shard):
+            _init_shard()
+
+    if shards.SHARDED:
+        conn = get_global_connection()
+        _create_global_tables(conn.cursor())
+        conn.commit()
+        conn.close()
+
+
+def _create_global_tables(cur):
+    # Patient ID sequence per day; workers reserve blocks from it
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS id_sequences (
+        day TEXT PRIMARY KEY,
+        next_value INTEGER NOT NULL
+    )
+    """)
+
+    # Feature drift bin counts, merged from every worker (see src/core/drift.py)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS drift_counts (
+        reference TEXT NOT NULL,
+        day TEXT NOT NULL,
+        feature TEXT NOT NULL,
+        bin INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (reference, day, feature, bin)
+    )
+    """)
+
+
+def _init_shard():
     conn = get_connection()
     cur = conn.cursor()
 
@@ -34,10 +104,564 @@ def init_db():
 
         risk_probability REAL,
         risk_category TEXT,
+        model_version TEXT,
 
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
 
+    _migrate(cur)
+
+    # Patient history lookups (dashboard trends, returning patients)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_records_patient
+    ON patient_records (patient_id, created_at)
+    """)
+
+    # Date ranges: archival by month, newest-first record listing
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_records_created
+    ON patient_records (created_at)
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS app_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """)
+
+    # Returning-patient lookup: salted hash of name + mobile -> patient.
+    # Databases from before the name was part of the key are reindexed.
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(patient_index)")}
+    if "mobile_hash" in columns:
+        cur.execute("DROP TABLE patient_index")
+        cur.execute("DELETE FROM app_settings WHERE key = 'patient_index_backfilled'")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS patient_index (
+        identity_hash TEXT PRIMARY KEY,
+        patient_id TEXT NOT NULL,
+        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Scores from later models, one row per (record, model version)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS patient_scores (
+        record_id INTEGER NOT NULL,
+        model_version TEXT NOT NULL,
+        risk_probability REAL,
+        risk_category TEXT,
+        scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (record_id, model_version)
+    )
+    """)
+
+    # Rising-risk alerts: one row per visit that rose sharply since
+    # the patient's previous visit (see src/core/alerts.py)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS risk_alerts (
+        record_id INTEGER PRIMARY KEY,
+        patient_id TEXT NOT NULL,
+        prev_record_id INTEGER NOT NULL,
+        created_at TIMESTAMP,
+        days_between REAL,
+        risk_probability REAL,
+        risk_delta REAL,
+        hba1c_delta REAL,
+        bmi_delta REAL,
+        risk_slope_30d REAL,
+        hba1c_slope_30d REAL,
+        bmi_slope_30d REAL,
+        reasons TEXT NOT NULL
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_alerts_created
+    ON risk_alerts (created_at DESC, record_id DESC)
+    """)
+
+    # Last patient_records id evaluated by each incremental job
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_progress (
+        job TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    create_cohort_aggregates(cur)
+
+    # Patients with visits in each archived month (see src/core/archive.py)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS archived_months (
+        patient_id TEXT NOT NULL,
+        month TEXT NOT NULL,
+        PRIMARY KEY (patient_id, month)
+    ) WITHOUT ROWID
+    """)
+
+    # Each patient's latest archived visit, the baseline for their
+    # next rising-risk comparison (see src/core/alerts.py)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS archived_last_visit (
+        patient_id TEXT PRIMARY KEY,
+        record_id INTEGER NOT NULL,
+        created_at TIMESTAMP,
+        risk_probability REAL,
+        hba1c REAL,
+        bmi REAL
+    )
+    """)
+
+    if not shards.SHARDED:
+        _create_global_tables(cur)
+
+    # Resumable rescoring checkpoints
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS rescore_progress (
+        model_version TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
     conn.commit()
     conn.close()
+
+    # Before any insert, on its own connection: resolving the salt
+    # commits, which must never split an assessment's transaction
+    _mobile_salt()
+
+    conn = get_connection()
+    _backfill_patient_index(conn)
+    conn.close()
+
+
+def _migrate(cur):
+    """
+    Add columns introduced after a database was first created
+    """
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(patient_records)")}
+
+    if "model_version" not in existing:
+        cur.execute("ALTER TABLE patient_records ADD COLUMN model_version TEXT")
+
+
+# =====================================================
+# COHORT AGGREGATES (MAINTAINED BY TRIGGERS)
+# =====================================================
+# Grouping dimensions: name -> SQL over a patient_records row alias
+COHORT_DIMENSIONS = {
+    "risk_category": "COALESCE({row}.risk_category, 'Unknown')",
+    "age_band": """CASE
+        WHEN {row}.age IS NULL THEN 'Unknown'
+        WHEN {row}.age < 30 THEN '18-29'
+        WHEN {row}.age < 40 THEN '30-39'
+        WHEN {row}.age < 50 THEN '40-49'
+        WHEN {row}.age < 60 THEN '50-59'
+        WHEN {row}.age < 70 THEN '60-69'
+        ELSE '70+' END""",
+    "language": "COALESCE({row}.language, 'Unknown')",
+}
+
+# Additive measures per row, so inserts and deletes are +/- one row
+COHORT_MEASURES = {
+    "n": "1",
+    "high_risk_n": "COALESCE({row}.risk_category = 'High', 0)",
+    "hba1c_n": "({row}.hba1c IS NOT NULL)",
+    "hba1c_sum": "COALESCE({row}.hba1c, 0)",
+    "risk_sum": "COALESCE({row}.risk_probability, 0)",
+}
+
+
+# Bump when the trigger bodies change; older triggers are replaced
+COHORT_TRIGGERS_VERSION = "2"
+
+
+def create_cohort_aggregates(cur, replace_triggers=False):
+    """
+    cohort_daily holds one row per (dimension, day, value) with
+    additive measures; triggers keep it in step with every insert
+    into and delete from patient_records.
+    """
+    existed = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cohort_daily'"
+    ).fetchone()
+
+    installed = cur.execute(
+        "SELECT value FROM app_settings WHERE key = 'cohort_triggers'"
+    ).fetchone()
+    if installed is None or installed[0] != COHORT_TRIGGERS_VERSION:
+        replace_triggers = True
+
+    measures = ",\n        ".join(
+        f"{m} {'INTEGER' if m.endswith('_n') or m == 'n' else 'REAL'} NOT NULL DEFAULT 0"
+        for m in COHORT_MEASURES
+    )
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS cohort_daily (
+        dimension TEXT NOT NULL,
+        day TEXT NOT NULL,
+        value TEXT NOT NULL,
+        {measures},
+        PRIMARY KEY (dimension, day, value)
+    )
+    """)
+
+    if replace_triggers:
+        cur.execute("DROP TRIGGER IF EXISTS cohort_after_insert")
+        cur.execute("DROP TRIGGER IF EXISTS cohort_after_delete")
+
+    cols = ", ".join(COHORT_MEASURES)
+
+    inserts = "\n".join(
+        f"""
+        INSERT INTO cohort_daily (dimension, day, value, {cols})
+        VALUES ('{dim}', date(NEW.created_at), {expr.format(row="NEW")},
+                {", ".join(m.format(row="NEW") for m in COHORT_MEASURES.values())})
+        ON CONFLICT (dimension, day, value) DO UPDATE SET
+            {", ".join(f"{m} = {m} + excluded.{m}" for m in COHORT_MEASURES)};
+        """
+        for dim, expr in COHORT_DIMENSIONS.items()
+    )
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS cohort_after_insert
+    AFTER INSERT ON patient_records
+    BEGIN
+        {inserts}
+    END
+    """)
+
+    deletes = "\n".join(
+        f"""
+        UPDATE cohort_daily SET
+            {", ".join(f"{m} = {m} - {sql.format(row='OLD')}" for m, sql in COHORT_MEASURES.items())}
+        WHERE dimension = '{dim}'
+          AND day = date(OLD.created_at)
+          AND value = {expr.format(row="OLD")};
+        DELETE FROM cohort_daily
+        WHERE dimension = '{dim}'
+          AND day = date(OLD.created_at)
+          AND value = {expr.format(row="OLD")}
+          AND n <= 0;
+        """
+        for dim, expr in COHORT_DIMENSIONS.items()
+    )
+    # Archived records stay counted: the archival job sets the
+    # archive.ARCHIVING_KEY setting inside its own delete transaction
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS cohort_after_delete
+    AFTER DELETE ON patient_records
+    WHEN NOT EXISTS (SELECT 1 FROM app_settings WHERE key = '{archive.ARCHIVING_KEY}')
+    BEGIN
+        {deletes}
+    END
+    """)
+    cur.execute(
+        "INSERT OR REPLACE INTO app_settings (key, value) VALUES ('cohort_triggers', ?)",
+        (COHORT_TRIGGERS_VERSION,)
+    )
+
+    # Databases created before the aggregates existed
+    if not existed:
+        rebuild_cohort_aggregates(cur)
+
+
+def archived_before(conn):
+    """
+    Day before which records live in the archive, or '' when
+    nothing has been archived
+    """
+    row = conn.execute(
+        f"SELECT value FROM app_settings WHERE key = '{archive.ARCHIVED_BEFORE_KEY}'"
+    ).fetchone()
+    return row[0] if row else ""
+
+
+def rebuild_cohort_aggregates(cur):
+    """
+    Recompute cohort_daily from patient_records (run inside a transaction).
+    Days already archived keep their aggregates.
+    """
+    cols = ", ".join(COHORT_MEASURES)
+    sums = ", ".join(f"SUM({sql.format(row='r')})" for sql in COHORT_MEASURES.values())
+    since = archived_before(cur)
+
+    cur.execute("DELETE FROM cohort_daily WHERE day >= ?", (since,))
+    for dim, expr in COHORT_DIMENSIONS.items():
+        cur.execute(f"""
+        INSERT INTO cohort_daily (dimension, day, value, {cols})
+        SELECT '{dim}', date(r.created_at), {expr.format(row="r")}, {sums}
+        FROM patient_records r
+        WHERE date(r.created_at) >= ?
+        GROUP BY 2, 3
+        """, (since,))
+
+
+# =====================================================
+# RETURNING PATIENTS
+# =====================================================
+_salts = {}
+
+
+def _mobile_salt():
+    if MOBILE_SALT:
+        return MOBILE_SALT.encode()
+
+    path = db_path()
+    if path not in _salts:
+        conn = get_connection()
+        try:
+            # First writer wins, so every worker ends up with the same salt
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO app_settings (key, value) VALUES ('mobile_salt', ?)",
+                    (secrets.token_hex(32),)
+                )
+            _salts[path] = conn.execute(
+                "SELECT value FROM app_settings WHERE key = 'mobile_salt'"
+            ).fetchone()[0].encode()
+        finally:
+            conn.close()
+
+    return _salts[path]
+
+
+def identity_hash(name, mobile):
+    """
+    HMAC-SHA256 of the normalized 10-digit mobile number and name.
+    Family members sharing a phone stay separate patients.
+    """
+    digits = re.sub(r"\D", "", str(mobile))[-10:]
+    normalized = " ".join(str(name).casefold().split())
+    return hmac.new(
+        _mobile_salt(), f"{digits}|{normalized}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _backfill_patient_index(conn):
+    """
+    Index name + mobile of records stored before the lookup existed
+    (latest patient ID per pair). Runs once per database; new visits
+    are indexed by insert_patient_record.
+    """
+    done = conn.execute(
+        "SELECT 1 FROM app_settings WHERE key = 'patient_index_backfilled'"
+    ).fetchone()
+    if done:
+        return
+
+    rows = conn.execute(
+        """
+        SELECT name, mobile, patient_id FROM patient_records
+        WHERE mobile IS NOT NULL AND mobile != '' AND name IS NOT NULL
+        ORDER BY created_at, id
+        """
+    ).fetchall()
+    latest = {identity_hash(name, mobile): patient_id for name, mobile, patient_id in rows}
+
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO patient_index (identity_hash, patient_id) VALUES (?, ?)",
+            latest.items()
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO app_settings (key, value) "
+            "VALUES ('patient_index_backfilled', CURRENT_TIMESTAMP)"
+        )
+
+
+RECORD_COLUMNS = [
+    "patient_id", "name", "mobile", "language", "gender", "age",
+    "hypertension", "heart_disease", "smoking_history",
+    "bmi", "hba1c", "glucose", "risk_probability", "risk_category",
+    "model_version",
+]
+
+
+def record_to_patient_data(record):
+    """
+    Map a patient_records row (dict-like) to model input fields
+    """
+    return {
+        "gender": record["gender"],
+        "age": record["age"],
+        "hypertension": record["hypertension"],
+        "heart_disease": record["heart_disease"],
+        "smoking_history": record["smoking_history"],
+        "bmi": record["bmi"],
+        "HbA1c_level": record["hba1c"],
+        "blood_glucose_level": record["glucose"]
+    }
+
+
+@timed("db.insert")
+def insert_patient_record(record):
+    """
+    Store one assessment. record: dict keyed by RECORD_COLUMNS
+    Returns the new row id.
+
+    A returning patient (same name and mobile as an earlier visit) is
+    stored under their existing patient_id, whatever record carries,
+    so visits form one history for the doctor. The match is never
+    reported back to the intake form.
+    """
+    # Hash first: resolving the salt may commit on its own connection
+    key = None
+    if record.get("mobile") and record.get("name"):
+        key = identity_hash(record["name"], record["mobile"])
+
+    values = {col: record.get(col) for col in RECORD_COLUMNS}
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Index first, in the same transaction: the upsert takes the write
+    # lock, so concurrent first visits still end up under one ID
+    if key:
+        values["patient_id"] = cur.execute(
+            """
+            INSERT INTO patient_index (identity_hash, patient_id) VALUES (?, ?)
+            ON CONFLICT(identity_hash) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
+            RETURNING patient_id
+            """,
+            (key, values["patient_id"])
+        ).fetchone()[0]
+
+    cur.execute(
+        f"INSERT INTO patient_records ({', '.join(RECORD_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in RECORD_COLUMNS)})",
+        list(values.values())
+    )
+    row_id = cur.lastrowid
+
+    conn.commit()
+    conn.close()
+    return row_id
+
+
+def reserve_id_block(day, size):
+    """
+    Reserve `size` consecutive sequence numbers for a day.
+    Returns (first, last); concurrent callers never overlap, in any
+    shard.
+    """
+    conn = get_global_connection()
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                INSERT INTO id_sequences (day, next_value) VALUES (?, 1)
+                ON CONFLICT(day) DO NOTHING
+                """,
+                (day,)
+            )
+            first = conn.execute(
+                "SELECT next_value FROM id_sequences WHERE day = ?", (day,)
+            ).fetchone()[0]
+            conn.execute(
+                "UPDATE id_sequences SET next_value = ? WHERE day = ?",
+                (first + size, day)
+            )
+    finally:
+        conn.close()
+
+    return first, first + size - 1
+
+
+def _read_scored(conn, where, params, model_version):
+    """
+    patient_records rows matching `where`, with rescored values for
+    model_version replacing the ones stored at assessment time
+    """
+    df = pd.read_sql(
+        f"""
+        SELECT r.*,
+               s.risk_probability AS rescored_probability,
+               s.risk_category AS rescored_category
+        FROM patient_records r
+        LEFT JOIN patient_scores s
+          ON s.record_id = r.id AND s.model_version = ?
+        {where}
+        """,
+        conn,
+        params=(model_version, *params)
+    )
+
+    return apply_rescores(df, model_version)
+
+
+def apply_rescores(df, model_version):
+    """
+    Replace stored scores with the rescored_* columns where present
+    """
+    rescored = df["rescored_probability"].notna()
+    if rescored.any():
+        df["risk_probability"] = df["risk_probability"].mask(rescored, df["rescored_probability"])
+        df["risk_category"] = df["risk_category"].mask(rescored, df["rescored_category"])
+        df["model_version"] = df["model_version"].mask(rescored, model_version)
+
+    return df.drop(columns=["rescored_probability", "rescored_category"])
+
+
+@timed("db.load_records")
+def load_records(model_version=None):
+    """
+    All records, newest first. When model_version is given and a
+    rescored value exists for it, that score replaces the one stored
+    at assessment time, so the dashboard never mixes models.
+    """
+    conn = get_connection()
+    try:
+        return _read_scored(conn, "ORDER BY r.created_at DESC", (), model_version)
+    finally:
+        conn.close()
+
+
+@timed("db.load_all_records")
+def load_all_records(model_version=None):
+    """
+    load_records across every shard (queried in parallel), with a
+    `shard` column. Record ids are only unique within a shard.
+    """
+    frames = shards.fan_out(lambda: load_records(model_version))
+    df = pd.concat(
+        [frame.assign(shard=shard) for shard, frame in frames.items()],
+        ignore_index=True
+    )
+    return df.sort_values("created_at", ascending=False, kind="stable", ignore_index=True)
+
+
+@timed("db.load_patient_history")
+def load_patient_history(patient_id, model_version=None):
+    """
+    One patient's assessments, oldest first (uses idx_records_patient),
+    including visits moved to the archive
+    """
+    conn = get_connection()
+    try:
+        df = _read_scored(
+            conn,
+            "WHERE r.patient_id = ? ORDER BY r.created_at, r.id",
+            (patient_id,),
+            model_version
+        )
+        months = archive.archived_months(conn, patient_id)
+    finally:
+        conn.close()
+
+    if not months:
+        return df
+
+    archived = apply_rescores(
+        archive.read_patient_history(patient_id, months, model_version),
+        model_version
+    )
+
+    # A record exported by an interrupted archival run may still be hot
+    archived = archived[~archived["id"].isin(df["id"])]
+    return pd.concat([archived, df]).sort_values(["created_at", "id"], ignore_index=True)
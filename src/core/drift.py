@@ -0,0 +1,479 @@
+"""
+Feature drift monitor
+
+Training saves a reference snapshot next to the model
+(train/model.reference.json): for every model input, quantile bin
+edges with the training counts per bin, or the training category
+counts. Each assessment then only increments one bin per feature.
+
+Bin counts are mergeable: a worker keeps its counts in memory and
+adds them into drift_counts (per reference and day) every
+CDS_DRIFT_FLUSH_EVERY assessments or CDS_DRIFT_FLUSH_SECONDS, so
+all workers (and all clinic shards, via the global database) share
+one summary and memory stays constant whatever
+the traffic. Scores compare the last CDS_DRIFT_WINDOW_DAYS against
+the reference:
+
+- PSI (population stability index) for every feature
+- KS (largest gap between the binned CDFs) for numeric features
+
+A feature whose PSI or KS crosses its threshold is logged once
+when a report (admin panel or CLI) first sees it drifting; the
+assessment insert path only counts and flushes.
+
+Build a reference:  python -m src.core.drift --reference data/diabetes_dataset.csv
+Report:             python -m src.core.drift
+"""
+
+import argparse
+import atexit
+import bisect
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.core.db import get_global_connection, init_db
+
+ENABLED = os.getenv("CDS_DRIFT", "1") == "1"
+
+FLUSH_EVERY = int(os.getenv("CDS_DRIFT_FLUSH_EVERY", "50"))
+FLUSH_SECONDS = float(os.getenv("CDS_DRIFT_FLUSH_SECONDS", "30"))
+WINDOW_DAYS = int(os.getenv("CDS_DRIFT_WINDOW_DAYS", "30"))
+
+# Conventional PSI reading: < 0.1 stable, 0.1-0.25 watch, > 0.25 drift
+PSI_WATCH = float(os.getenv("CDS_DRIFT_PSI_WATCH", "0.1"))
+PSI_ALERT = float(os.getenv("CDS_DRIFT_PSI_ALERT", "0.25"))
+KS_ALERT = float(os.getenv("CDS_DRIFT_KS_ALERT", "0.15"))
+MIN_SAMPLES = int(os.getenv("CDS_DRIFT_MIN_SAMPLES", "200"))
+
+# Model inputs, by training column name
+NUMERIC_FEATURES = ["age", "bmi", "HbA1c_level", "blood_glucose_level"]
+CATEGORICAL_FEATURES = ["gender", "smoking_history", "hypertension", "heart_disease"]
+
+# Form values with no training category of their own, mapped onto
+# the nearest one (explainability also treats "occasional" as current)
+CATEGORY_ALIASES = {
+    "smoking_history": {"occasional": "current"},
+}
+
+REFERENCE_BINS = 20
+REFERENCE_SAMPLE = 200_000
+
+# Floor for empty bins in PSI
+EPSILON = 1e-4
+
+logger = logging.getLogger(__name__)
+
+
+def reference_path(model_path):
+    """
+    train/model.pkl -> train/model.reference.json
+    """
+    return os.path.splitext(model_path)[0] + ".reference.json"
+
+
+# Written by train/train_model.py next to train/model.pkl
+REFERENCE_PATH = os.getenv("CDS_DRIFT_REFERENCE", reference_path("train/model.pkl"))
+
+
+def _category(value):
+    # 1, 1.0 and "1" are the same flag
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+# =====================================================
+# REFERENCE SNAPSHOT (TRAINING TIME)
+# =====================================================
+def build_reference(data_path, chunksize=100_000, seed=42):
+    """
+    Reference bins and counts from the training CSV, streamed in
+    chunks: quantile edges come from a uniform sample of at most
+    REFERENCE_SAMPLE rows, counts from every row.
+    """
+    columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+    rng = np.random.default_rng(seed)
+
+    # Pass 1: bottom-k random sample for the edges, exact category counts
+    sample, keys = None, None
+    categories = {col: Counter() for col in CATEGORICAL_FEATURES}
+    rows = 0
+
+    for chunk in pd.read_csv(data_path, usecols=columns, chunksize=chunksize):
+        chunk = chunk.dropna()
+        rows += len(chunk)
+
+        for col in CATEGORICAL_FEATURES:
+            categories[col].update(_category(v) for v in chunk[col].tolist())
+
+        chunk_keys = rng.random(len(chunk))
+        if sample is None:
+            sample, keys = chunk[NUMERIC_FEATURES], chunk_keys
+        else:
+            sample = pd.concat([sample, chunk[NUMERIC_FEATURES]])
+            keys = np.concatenate([keys, chunk_keys])
+
+        if len(keys) > REFERENCE_SAMPLE:
+            keep = np.argpartition(keys, REFERENCE_SAMPLE)[:REFERENCE_SAMPLE]
+            sample, keys = sample.iloc[keep], keys[keep]
+
+    if not rows:
+        raise ValueError(f"No complete rows in {data_path}")
+
+    quantiles = np.linspace(0, 1, REFERENCE_BINS + 1)[1:-1]
+    edges = {
+        col: np.unique(np.quantile(sample[col].to_numpy(float), quantiles))
+        for col in NUMERIC_FEATURES
+    }
+
+    # Pass 2: exact counts per numeric bin (last slot: missing)
+    counts = {col: np.zeros(len(edges[col]) + 2, dtype=np.int64) for col in NUMERIC_FEATURES}
+    for chunk in pd.read_csv(data_path, usecols=columns, chunksize=chunksize):
+        chunk = chunk.dropna()
+        for col in NUMERIC_FEATURES:
+            bins = np.searchsorted(edges[col], chunk[col].to_numpy(float), side="right")
+            counts[col][:-1] += np.bincount(bins, minlength=len(edges[col]) + 1)
+
+    features = {
+        col: {"kind": "numeric", "edges": edges[col].tolist()}
+        for col in NUMERIC_FEATURES
+    }
+    features.update({
+        col: {"kind": "categorical", "categories": sorted(categories[col])}
+        for col in CATEGORICAL_FEATURES
+    })
+
+    reference = {
+        # Same bins -> same version, so stored counts stay comparable
+        "version": hashlib.sha256(
+            json.dumps(features, sort_keys=True).encode()
+        ).hexdigest()[:12],
+        "source": os.path.basename(data_path),
+        "rows": rows,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "features": features,
+    }
+
+    for col in NUMERIC_FEATURES:
+        features[col]["counts"] = counts[col].tolist()
+    for col in CATEGORICAL_FEATURES:
+        # Last slot: categories never seen in training
+        features[col]["counts"] = [categories[col][c] for c in features[col]["categories"]] + [0]
+
+    return reference
+
+
+def save_reference(data_path, out_path):
+    reference = build_reference(data_path)
+
+    with open(out_path + ".tmp", "w") as f:
+        json.dump(reference, f, indent=2)
+    os.replace(out_path + ".tmp", out_path)
+
+    return out_path
+
+
+# =====================================================
+# STREAMING COUNTS (LIVE INSERT PATH)
+# =====================================================
+_lock = threading.Lock()
+_reference = None           # (mtime, snapshot)
+_reference_checked = 0.0
+_pending = {}               # (reference, day, feature) -> [count per bin]
+_pending_n = 0
+_last_flush = time.monotonic()
+_alerting = set()
+
+
+def _load_reference():
+    """
+    Current reference snapshot, or None. The file is re-checked at
+    most every FLUSH_SECONDS, so a retrained model's reference is
+    picked up without a restart.
+    """
+    global _reference, _reference_checked
+
+    now = time.monotonic()
+    if _reference is not None and now - _reference_checked < FLUSH_SECONDS:
+        return _reference[1]
+    _reference_checked = now
+
+    try:
+        mtime = os.stat(REFERENCE_PATH).st_mtime
+    except OSError:
+        _reference = None
+        return None
+
+    if _reference is None or _reference[0] != mtime:
+        with open(REFERENCE_PATH) as f:
+            snapshot = json.load(f)
+        for spec in snapshot["features"].values():
+            if spec["kind"] == "categorical":
+                spec["index"] = {c: i for i, c in enumerate(spec["categories"])}
+        _reference = (mtime, snapshot)
+
+    return _reference[1]
+
+
+def _current_reference():
+    """
+    _load_reference() under _lock, for callers outside observe().
+    Snapshots are replaced, never mutated, so the result stays valid.
+    """
+    with _lock:
+        return _load_reference()
+
+
+def _bin(spec, value):
+    if spec["kind"] == "categorical":
+        if value is None:
+            return len(spec["categories"])
+        return spec["index"].get(_category(value), len(spec["categories"]))
+
+    try:
+        return bisect.bisect_right(spec["edges"], float(value))
+    except (TypeError, ValueError):
+        return len(spec["edges"]) + 1
+
+
+def observe(patient_data):
+    """
+    Count one assessment (model input dict). Costs one bin lookup
+    per feature; counts are written out every FLUSH_EVERY calls.
+    """
+    global _pending_n
+
+    if not ENABLED:
+        return
+
+    with _lock:
+        reference = _load_reference()
+        if reference is None:
+            return
+
+        day = datetime.now(timezone.utc).date().isoformat()
+        for feature, spec in reference["features"].items():
+            key = (reference["version"], day, feature)
+            counts = _pending.get(key)
+            if counts is None:
+                counts = _pending[key] = [0] * len(spec["counts"])
+            value = patient_data.get(feature)
+            value = CATEGORY_ALIASES.get(feature, {}).get(value, value)
+            counts[_bin(spec, value)] += 1
+
+        _pending_n += 1
+        due = (
+            _pending_n >= FLUSH_EVERY
+            or time.monotonic() - _last_flush >= FLUSH_SECONDS
+        )
+
+    if due:
+        flush()
+
+
+def _merge_back(pending):
+    for key, counts in pending.items():
+        current = _pending.setdefault(key, [0] * len(counts))
+        for i, c in enumerate(counts):
+            current[i] += c
+
+
+def flush(conn=None):
+    """
+    Add this worker's counts into drift_counts
+    """
+    global _pending, _pending_n, _last_flush
+
+    with _lock:
+        pending, _pending = _pending, {}
+        n, _pending_n = _pending_n, 0
+        _last_flush = time.monotonic()
+
+    if not pending:
+        return 0
+
+    own = conn is None
+    conn = conn or get_global_connection()
+    try:
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO drift_counts (reference, day, feature, bin, count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (reference, day, feature, bin)
+                DO UPDATE SET count = count + excluded.count
+                """,
+                [
+                    (ref, day, feature, i, c)
+                    for (ref, day, feature), counts in pending.items()
+                    for i, c in enumerate(counts) if c
+                ]
+            )
+    except sqlite3.Error:
+        # Counts are additive: keep them for the next flush
+        with _lock:
+            _merge_back(pending)
+            _pending_n += n
+        logger.exception("Drift counts flush failed")
+        return 0
+    finally:
+        if own:
+            conn.close()
+
+    return n
+
+
+atexit.register(flush)
+
+
+# =====================================================
+# SCORES
+# =====================================================
+def _proportions(counts):
+    total = counts.sum()
+    return np.clip(counts / total, EPSILON, None) if total else counts
+
+
+def psi(expected, actual):
+    """
+    Population stability index between two count vectors
+    """
+    e = _proportions(np.asarray(expected, dtype=float))
+    a = _proportions(np.asarray(actual, dtype=float))
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual):
+    """
+    Largest gap between the two binned CDFs (missing slot excluded)
+    """
+    e = np.asarray(expected[:-1], dtype=float)
+    a = np.asarray(actual[:-1], dtype=float)
+    if not e.sum() or not a.sum():
+        return None
+    return float(np.max(np.abs(np.cumsum(e) / e.sum() - np.cumsum(a) / a.sum())))
+
+
+def _status(n, psi_value, ks_value):
+    if n < MIN_SAMPLES:
+        return "insufficient"
+    if psi_value >= PSI_ALERT or (ks_value is not None and ks_value >= KS_ALERT):
+        return "drift"
+    if psi_value >= PSI_WATCH:
+        return "watch"
+    return "ok"
+
+
+def _report(conn, window_days):
+    reference = _current_reference()
+    if reference is None:
+        return []
+
+    stored = conn.execute(
+        """
+        SELECT feature, bin, SUM(count)
+        FROM drift_counts
+        WHERE reference = ? AND day >= date('now', ?)
+        GROUP BY feature, bin
+        """,
+        (reference["version"], f"-{window_days - 1} days")
+    ).fetchall()
+
+    live = {
+        feature: np.zeros(len(spec["counts"]), dtype=np.int64)
+        for feature, spec in reference["features"].items()
+    }
+    for feature, b, count in stored:
+        if feature in live and b < len(live[feature]):
+            live[feature][b] += count
+
+    rows = []
+    for feature, spec in reference["features"].items():
+        actual = live[feature]
+        n = int(actual.sum())
+        psi_value = psi(spec["counts"], actual) if n else 0.0
+        ks_value = ks(spec["counts"], actual) if n and spec["kind"] == "numeric" else None
+
+        rows.append({
+            "feature": feature,
+            "kind": spec["kind"],
+            "n": n,
+            "psi": round(psi_value, 4),
+            "ks": None if ks_value is None else round(ks_value, 4),
+            # Missing numeric values or categories unseen in training
+            "unseen_share": round(float(actual[-1]) / n, 4) if n else 0.0,
+            "status": _status(n, psi_value, ks_value),
+        })
+    return rows
+
+
+def _check_alerts(rows, window_days):
+    started = []
+    with _lock:
+        for row in rows:
+            if row["status"] != "drift":
+                _alerting.discard(row["feature"])
+            elif row["feature"] not in _alerting:
+                _alerting.add(row["feature"])
+                started.append(row)
+
+    for row in started:
+        logger.warning(
+            "Feature drift on %s: PSI %.3f%s over %d assessments (last %d days)",
+            row["feature"], row["psi"],
+            "" if row["ks"] is None else f", KS {row['ks']:.3f}",
+            row["n"], window_days
+        )
+
+
+def report(window_days=WINDOW_DAYS):
+    """
+    One row per feature: samples in the window, PSI, KS, status.
+    Empty when no reference snapshot exists. Logs features that
+    started drifting.
+    """
+    flush()
+
+    conn = get_global_connection()
+    try:
+        rows = _report(conn, window_days)
+    finally:
+        conn.close()
+
+    _check_alerts(rows, window_days)
+    return rows
+
+
+def reference_info():
+    reference = _current_reference()
+    if reference is None:
+        return None
+    return {k: reference[k] for k in ("version", "source", "rows", "created_at")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature drift monitor")
+    parser.add_argument("--reference", metavar="CSV",
+                        help="Build the reference snapshot from a training CSV")
+    parser.add_argument("--out", default=REFERENCE_PATH)
+    parser.add_argument("--days", type=int, default=WINDOW_DAYS)
+    args = parser.parse_args()
+
+    if args.reference:
+        print(f"✅ Reference saved at {save_reference(args.reference, args.out)}")
+    else:
+        init_db()
+        rows = report(args.days)
+        if not rows:
+            raise SystemExit(f"❌ No reference snapshot at {REFERENCE_PATH}")
+        print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,201 @@
+"""
+Streaming record export (CSV / Parquet)
+
+Walks patient_records in primary-key chunks (a short read per chunk,
+so live inserts are never held up behind a long export) and yields
+the file as a sequence of byte strings. Each chunk gets the live
+model's rescored values where present, plus derived columns:
+
+- severity_level / severity_band from SEVERITY_BANDS
+- model_version that produced the exported score
+
+Only one chunk is in memory at a time, whatever the export size;
+to_file() spools the bytes to a temporary file for download.
+
+    python -m src.core.export out.parquet --start 2025-01-01 --category High
+"""
+
+import argparse
+import io
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core import archive
+from src.core.banding import SEVERITY_BANDS
+from src.core.db import apply_rescores, get_connection, init_db
+
+CHUNK_SIZE = 20_000
+
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+SCHEMA = archive.SCHEMAS[archive.RECORDS].append(
+    pa.field("severity_level", pa.int8())
+).append(
+    pa.field("severity_band", pa.string())
+)
+
+
+# =====================================================
+# ROWS
+# =====================================================
+def iter_chunks(model_version=None, start=None, end=None, categories=None,
+                chunk_size=CHUNK_SIZE):
+    """
+    DataFrames of at most chunk_size records, oldest id first, with
+    start <= created_at < end (ISO dates) and the (rescored) risk
+    category in `categories`, when given
+    """
+    where, params = ["r.id > ?"], []
+    if start:
+        where.append("r.created_at >= ?")
+        params.append(str(start))
+    if end:
+        where.append("r.created_at < ?")
+        params.append(str(end))
+    if categories:
+        where.append(
+            f"COALESCE(s.risk_category, r.risk_category) IN ({', '.join('?' for _ in categories)})"
+        )
+        params.extend(categories)
+
+    sql = f"""
+        SELECT r.*,
+               s.risk_probability AS rescored_probability,
+               s.risk_category AS rescored_category
+        FROM patient_records r
+        LEFT JOIN patient_scores s
+          ON s.record_id = r.id AND s.model_version = ?
+        WHERE {" AND ".join(where)}
+        ORDER BY r.id
+        LIMIT ?
+    """
+
+    last_id = 0
+    while True:
+        conn = get_connection()
+        try:
+            cur = conn.execute(sql, (model_version, last_id, *params, chunk_size))
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+
+        if not rows:
+            return
+
+        df = apply_rescores(pd.DataFrame.from_records(rows, columns=columns), model_version)
+        probs = df["risk_probability"]
+        codes = SEVERITY_BANDS.codes(probs.fillna(0).to_numpy())
+        df["severity_level"] = pd.Series(codes, index=df.index, dtype="Int8").mask(probs.isna())
+        df["severity_band"] = pd.Series(SEVERITY_BANDS.labels(codes), index=df.index).mask(probs.isna())
+
+        last_id = int(df["id"].iloc[-1])
+        yield df[SCHEMA.names]
+
+        if len(rows) < chunk_size:
+            return
+
+
+# =====================================================
+# ENCODERS
+# =====================================================
+def iter_csv(chunks):
+    """
+    Header row first, even when no records match
+    """
+    header = True
+    for df in chunks:
+        yield df.to_csv(index=False, header=header).encode()
+        header = False
+    if header:
+        yield (",".join(SCHEMA.names) + "\n").encode()
+
+
+class _Drain(io.RawIOBase):
+    """
+    Write-only sink that hands out what was written since the last
+    drain(), while tell() keeps counting (Parquet footers store
+    absolute offsets)
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_parquet(chunks):
+    """
+    One zstd row group per chunk
+    """
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, SCHEMA, compression=archive.COMPRESSION)
+    try:
+        for df in chunks:
+            writer.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export(fmt, model_version=None, start=None, end=None, categories=None):
+    """
+    Byte chunks of the export file in `fmt` (see FORMATS)
+    """
+    chunks = iter_chunks(model_version, start, end, categories)
+    encode = iter_parquet if fmt == "parquet" else iter_csv
+    return encode(chunks)
+
+
+def to_file(parts):
+    """
+    Spool byte chunks to an anonymous temporary file, rewound
+    """
+    f = tempfile.TemporaryFile()
+    for part in parts:
+        f.write(part)
+    f.seek(0)
+    return f
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export patient records")
+    parser.add_argument("out", help="Output file (.csv or .parquet)")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--category", action="append",
+                        help="Risk category to include (repeatable)")
+    parser.add_argument("--model-version",
+                        help="Use rescored values for this model version")
+    args = parser.parse_args()
+
+    init_db()
+    fmt = "parquet" if args.out.endswith(".parquet") else "csv"
+    size = 0
+    with open(args.out, "wb") as f:
+        for part in export(fmt, args.model_version, args.start, args.end, args.category):
+            f.write(part)
+            size += len(part)
+
+    print(f"✅ {size / 1e6:.1f} MB written to {args.out}")
@@ -0,0 +1,142 @@
+"""
+Shared feature encoder (training + serving)
+
+One-hot encodes patient records against a frozen category
+vocabulary, writing straight into a preallocated NumPy array.
+The same object is pickled with the model, so batch and single
+scoring always produce identical columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+NUMERIC_COLS = [
+    "age", "hypertension", "heart_disease",
+    "bmi", "HbA1c_level", "blood_glucose_level"
+]
+
+CATEGORY_VOCAB = {
+    "gender": ["Female", "Male", "Other"],
+    "smoking_history": [
+        "No Info", "current", "ever", "former", "never", "not current"
+    ],
+}
+
+# Bump whenever the encoding changes, to invalidate cached datasets
+ENCODER_VERSION = "fixed-vocab-v1"
+
+
+class FeatureEncoder:
+    """
+    feature_names: model column order, e.g. ["age", ..., "gender_Male", ...]
+    categorical_cols: raw columns that were one-hot encoded
+
+    Unknown categories encode as all zeros and missing numeric
+    fields as 0, exactly like get_dummies + reindex(fill_value=0).
+    """
+
+    def __init__(self, feature_names, categorical_cols=tuple(CATEGORY_VOCAB)):
+        self.feature_names = list(feature_names)
+
+        self._numeric = []
+        self._slots = {col: {} for col in categorical_cols}
+
+        for i, name in enumerate(self.feature_names):
+            for col in categorical_cols:
+                prefix = f"{col}_"
+                if name.startswith(prefix):
+                    self._slots[col][name[len(prefix):]] = i
+                    break
+            else:
+                self._numeric.append((i, name))
+
+        self._slots = {col: slots for col, slots in self._slots.items() if slots}
+
+    @classmethod
+    def from_vocabulary(cls, numeric_cols=NUMERIC_COLS, category_vocab=CATEGORY_VOCAB):
+        feature_names = list(numeric_cols) + [
+            f"{col}_{cat}" for col, cats in category_vocab.items() for cat in cats
+        ]
+        return cls(feature_names, tuple(category_vocab))
+
+    @property
+    def category_vocab(self):
+        return {col: list(slots) for col, slots in self._slots.items()}
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    # -----------------------------
+    # SINGLE RECORD
+    # -----------------------------
+    def transform_one(self, record, out=None):
+        if out is None:
+            out = np.zeros(self.n_features)
+        else:
+            out[:] = 0.0
+
+        for i, col in self._numeric:
+            out[i] = record.get(col, 0)
+
+        for col, slots in self._slots.items():
+            i = slots.get(record.get(col))
+            if i is not None:
+                out[i] = 1.0
+
+        return out
+
+    # -----------------------------
+    # BATCH (LIST OF DICTS OR DATAFRAME)
+    # -----------------------------
+    def transform(self, records, out=None):
+        if isinstance(records, pd.DataFrame):
+            n = len(records)
+            numeric = {
+                col: records[col].to_numpy()
+                for _, col in self._numeric if col in records
+            }
+            categorical = {
+                col: records[col].to_numpy()
+                for col in self._slots if col in records
+            }
+        else:
+            records = list(records)
+            n = len(records)
+            numeric = {
+                col: [r.get(col, 0) for r in records] for _, col in self._numeric
+            }
+            categorical = {
+                col: [r.get(col) for r in records] for col in self._slots
+            }
+
+        if out is None:
+            out = np.zeros((n, self.n_features))
+        else:
+            out[:] = 0.0
+
+        for i, col in self._numeric:
+            if col in numeric:
+                out[:, i] = np.asarray(numeric[col], dtype=float)
+
+        rows = np.arange(n)
+        for col, values in categorical.items():
+            slots = self._slots[col]
+            cols = np.fromiter(slots.values(), dtype=int, count=len(slots))
+            codes = pd.Categorical(values, categories=list(slots)).codes
+            known = codes >= 0
+            out[rows[known], cols[codes[known]]] = 1.0
+
+        return out
+
+    def transform_frame(self, df):
+        """
+        Encoded DataFrame (training), columns in model order
+        """
+        return pd.DataFrame(
+            self.transform(df), columns=self.feature_names, index=df.index
+        )
+
+
+DEFAULT_ENCODER = FeatureEncoder.from_vocabulary()
@@ -1,4 +1,5 @@
 from src.core.llm_engine import generate_llm_explanation
+from src.core.metrics import timed
 
 
 def _rule_based_summary(patient_data):
@@ -45,6 +46,34 @@ def _rule_based_summary(patient_data):
     return insights
 
 
+def rule_based_explanation(patient_data, risk, prob, audience="patient"):
+    """
+    Deterministic explanation text (no GenAI).
+    Used as the fallback in explain() and by the scoring service.
+    """
+    if audience == "clinician":
+        rule_insights = _rule_based_summary(patient_data)
+        return (
+            f"Predicted {risk} diabetes risk "
+            f"({prob*100:.2f}%). "
+            f"Key contributing factors include: "
+            f"{'; '.join(rule_insights)}. "
+            "This assessment should be used as a screening aid. "
+            "Recommend lifestyle modification, metabolic monitoring, "
+            "and appropriate follow-up testing."
+        )
+    else:
+        return (
+            f"Based on your health details, your diabetes risk is {risk.lower()} "
+            f"({prob*100:.2f}%). "
+            "Some factors affecting this risk include diet, weight, "
+            "and blood sugar levels. "
+            "Healthy eating, daily walking, and regular check-ups "
+            "can help reduce future risk."
+        )
+
+
+@timed("explain")
 def explain(patient_data, risk, prob, audience="patient"):
     """
     Hybrid explanation engine:
@@ -52,8 +81,6 @@ def explain(patient_data, risk, prob, audience="patient"):
     - GenAI explanation (optional, fail-safe)
     """
 
-    rule_insights = _rule_based_summary(patient_data)
-
     # -----------------------------
     # TRY GENAI (OPTIONAL LAYER)
     # -----------------------------
@@ -70,22 +97,4 @@ def explain(patient_data, risk, prob, audience="patient"):
     # FAIL-SAFE FALLBACK (IMPORTANT)
     # -----------------------------
     except Exception:
-        if audience == "clinician":
-            return (
-                f"Predicted {risk} diabetes risk "
-                f"({prob*100:.2f}%). "
-                f"Key contributing factors include: "
-                f"{'; '.join(rule_insights)}. "
-                "This assessment should be used as a screening aid. "
-                "Recommend lifestyle modification, metabolic monitoring, "
-                "and appropriate follow-up testing."
-            )
-        else:
-            return (
-                f"Based on your health details, your diabetes risk is {risk.lower()} "
-                f"({prob*100:.2f}%). "
-                "Some factors affecting this risk include diet, weight, "
-                "and blood sugar levels. "
-                "Healthy eating, daily walking, and regular check-ups "
-                "can help reduce future risk."
-            )
+        return rule_based_explanation(patient_data, risk, prob, audience)
@@ -1,64 +1,67 @@
+"""
+Translation catalog
+
+One JSON file per language in src/core/locales/<code>.json. A
+language is parsed the first time it is asked for and kept for the
+life of the process, so reruns only do a dict lookup and a
+deployment that serves one language never reads the other regional
+catalogs.
+
+Keys missing from a regional catalog fall back to English, so
+en.json is always read as the base of a regional catalog, even when
+English itself is not in CDS_LANGUAGES.
+
+To add a language: drop <code>.json next to en.json and add it to
+LANGUAGES. CDS_LANGUAGES=English,Hindi limits what the app offers.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+# Display name (as stored with each record) -> catalog file
+LANGUAGES = {
+    "English": "en",
+    "Hindi": "hi",
+}
+
+DEFAULT_LANGUAGE = "English"
+
+ENABLED_LANGUAGES = [
+    lang for lang in os.getenv("CDS_LANGUAGES", ",".join(LANGUAGES)).split(",")
+    if lang in LANGUAGES
+] or [DEFAULT_LANGUAGE]
+
+_catalogs = {}
+_catalogs_lock = threading.RLock()
+
+
+def _read(code):
+    with open(os.path.join(LOCALES_DIR, f"{code}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compile(lang):
+    text = _read(LANGUAGES[lang])
+    if lang != DEFAULT_LANGUAGE:
+        text = {**get_text(DEFAULT_LANGUAGE), **text}
+    return MappingProxyType(text)
+
+
 def get_text(lang):
-    TEXT = {
-        "English": {
-            "select_language": "Select Language",
-            "continue": "Continue",
-            "personal_details": "Personal Details",
-            "full_name": "Full Name",
-            "mobile": "Mobile Number",
-            "proceed": "Proceed to Health Assessment",
-            "health_form": "Health Assessment Form",
-            "patient_id": "Patient ID",
-            "basic_info": "Basic Information",
-            "gender": "Gender",
-            "age": "Age (years)",
-            "medical_history": "Medical History",
-            "hypertension": "High Blood Pressure?",
-            "heart_disease": "Heart Disease?",
-            "smoking": "Smoking History",
-            "clinical": "Clinical Measurements",
-            "check_risk": "Check My Diabetes Risk",
-            "risk_result": "Risk Result",
-            "risk_category": "Risk Category",
-            "ai_explanation": "AI Health Explanation",
-            "dashboard": "Doctor Dashboard",
-            "patient_records": "Patient Records",
-            "select_patient": "Select Patient ID",
-            "risk_overview": "Risk Overview",
-            "history_trends": "Patient Risk History & Trends",
-            "next_steps": "Recommended Next Steps",
-            "download_pdf": "Download Report"
-        },
-
-        "Hindi": {
-            "select_language": "भाषा चुनें",
-            "continue": "आगे बढ़ें",
-            "personal_details": "व्यक्तिगत जानकारी",
-            "full_name": "पूरा नाम",
-            "mobile": "मोबाइल नंबर",
-            "proceed": "स्वास्थ्य जांच शुरू करें",
-            "health_form": "स्वास्थ्य मूल्यांकन फॉर्म",
-            "patient_id": "रोगी आईडी",
-            "basic_info": "मूल जानकारी",
-            "gender": "लिंग",
-            "age": "आयु (वर्ष)",
-            "medical_history": "चिकित्सा इतिहास",
-            "hypertension": "उच्च रक्तचाप?",
-            "heart_disease": "हृदय रोग?",
-            "smoking": "धूम्रपान की आदत",
-            "clinical": "क्लिनिकल माप",
-            "check_risk": "डायबिटीज जोखिम जांचें",
-            "risk_result": "जोखिम परिणाम",
-            "risk_category": "जोखिम श्रेणी",
-            "ai_explanation": "एआई स्वास्थ्य व्याख्या",
-            "dashboard": "डॉक्टर डैशबोर्ड",
-            "patient_records": "रोगी रिकॉर्ड",
-            "select_patient": "रोगी आईडी चुनें",
-            "risk_overview": "जोखिम सारांश",
-            "history_trends": "रोगी जोखिम प्रवृत्ति",
-            "next_steps": "अनुशंसित अगले कदम",
-            "download_pdf": "रिपोर्ट डाउनलोड करें"
-        }
-    }
-
-    return TEXT[lang]
+    """
+    Read-only {key: text} for a language (unknown -> English)
+    """
+    if lang not in LANGUAGES:
+        lang = DEFAULT_LANGUAGE
+
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(lang)
+            if catalog is None:
+                catalog = _catalogs[lang] = _compile(lang)
+    return catalog
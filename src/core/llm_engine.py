@@ -2,21 +2,45 @@ import os
 import streamlit as st
 from google import genai
 
+from src.core.metrics import timed
+
+
 def get_api_key():
     # Local (.env) OR Streamlit Cloud (Secrets)
-    return os.getenv("GEMINI_API_KEY") or st.secrets.get("GEMINI_API_KEY")
+    key = os.getenv("GEMINI_API_KEY")
+    if key:
+        return key
+    try:
+        return st.secrets.get("GEMINI_API_KEY")
+    except Exception:
+        # No secrets file configured
+        return None
 
-GEMINI_API_KEY = get_api_key()
 
-if not GEMINI_API_KEY:
-    raise ValueError(
-        "❌ GEMINI_API_KEY not found. "
-        "Add it to Streamlit Secrets or environment variables."
-    )
+_client = None
+
+
+def get_client():
+    """
+    Gemini client, created on first use so the app (and the
+    rule-based fallback) still works without an API key
+    """
+    global _client
+
+    if _client is None:
+        api_key = get_api_key()
+        if not api_key:
+            raise ValueError(
+                "❌ GEMINI_API_KEY not found. "
+                "Add it to Streamlit Secrets or environment variables."
+            )
+        # Create Gemini client
+        _client = genai.Client(api_key=api_key)
+
+    return _client
 
-# Create Gemini client
-client = genai.Client(api_key=GEMINI_API_KEY)
 
+@timed("llm.generate")
 def generate_llm_explanation(patient_data, risk, prob, audience="patient"):
     """
     audience: 'patient' | 'clinician'
@@ -41,7 +65,7 @@ Rules:
 - Clinical tone for doctors
 """
 
-    response = client.models.generate_content(
+    response = get_client().models.generate_content(
         model="gemini-1.5-flash",
         contents=prompt
     )
@@ -0,0 +1,197 @@
+"""
+Memory-mapped linear model weights
+
+A pickled model costs every worker process its own unpickled copy
+plus an sklearn import. For linear models the weights and scaler
+statistics are exported to one raw .npy file, opened read-only with
+mmap: all workers share the same page-cache pages and a new worker
+can score as soon as the file is mapped.
+
+    train/model.weights.<sha>.npy    float64 (3, n_features + 1)
+                                     row 0: coef, intercept in the last column
+                                     row 1: scaler mean (0 where unscaled)
+                                     row 2: scaler scale (1 where unscaled)
+    train/model.weights.<sha>.json   feature names, categorical columns,
+                                     model version, checksum of the .npy
+    train/model.weights.npy          symlink to the live .npy
+
+Each export writes a new versioned pair and then swaps the symlink
+in one rename, so a reader never sees weights and sidecar from
+different exports. (A plain model.weights.npy with its .json beside
+it, from older exports, still loads.)
+
+Export an existing artifact:
+    python -m src.core.mapped_model train/model.pkl
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from src.core.feature_encoder import ENCODER_VERSION, FeatureEncoder
+
+WEIGHTS_SUFFIX = ".weights.npy"
+
+COEF_ROW, MEAN_ROW, SCALE_ROW = 0, 1, 2
+
+
+def mapped_path(model_path):
+    """
+    train/model.pkl -> train/model.weights.npy
+    """
+    return os.path.splitext(model_path)[0] + WEIGHTS_SUFFIX
+
+
+def sidecar_path(weights_path):
+    return weights_path[:-len(".npy")] + ".json"
+
+
+class MappedScaler:
+    """
+    Read-only StandardScaler stand-in (mean_/scale_ are mmap views)
+    """
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class MappedLinearModel:
+    """
+    Binary logistic model over mmap'd coefficients.
+    Exposes coef_/intercept_ like the sklearn estimator it replaces.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, coef, intercept):
+        self.coef_ = coef[np.newaxis, :]
+        self.intercept_ = np.array([intercept])
+        self.n_features_in_ = coef.shape[0]
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_[0] + self.intercept_[0]
+
+    def predict_proba(self, X):
+        # Numerically stable logistic function
+        p = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+def export_weights(model, scaler, feature_names, encoder, version, out_path):
+    """
+    Write the mmap-able weights + sidecar for a fitted linear model.
+    Raises ValueError for models that are not binary and linear.
+    """
+    coef = getattr(model, "coef_", None)
+    if coef is None or coef.shape[0] != 1:
+        raise ValueError(f"{type(model).__name__} is not a binary linear model")
+    if getattr(model, "loss", "log_loss") not in ("log_loss", "log"):
+        raise ValueError(f"{type(model).__name__} does not output logistic probabilities")
+
+    n = len(feature_names)
+    weights = np.zeros((3, n + 1))
+    weights[COEF_ROW, :n] = coef[0]
+    weights[COEF_ROW, n] = float(np.ravel(model.intercept_)[0])
+    weights[SCALE_ROW] = 1.0
+
+    if scaler is not None:
+        if not hasattr(scaler, "mean_"):
+            raise ValueError(f"{type(scaler).__name__} is not mean/scale based")
+        if getattr(scaler, "with_mean", True):
+            weights[MEAN_ROW, :n] = scaler.mean_
+        if getattr(scaler, "with_std", True):
+            weights[SCALE_ROW, :n] = scaler.scale_
+
+    meta = {
+        "version": version,
+        "feature_names": list(feature_names),
+        "categorical_cols": list(encoder.category_vocab),
+        "encoder_version": ENCODER_VERSION,
+        "sha256": hashlib.sha256(weights.tobytes()).hexdigest(),
+    }
+
+    # Complete versioned pair first, then publish it with one rename
+    versioned = f"{out_path[:-len('.npy')]}.{meta['sha256'][:12]}.npy"
+    with open(sidecar_path(versioned) + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    with open(versioned + ".tmp", "wb") as f:
+        np.save(f, weights)
+    os.replace(sidecar_path(versioned) + ".tmp", sidecar_path(versioned))
+    os.replace(versioned + ".tmp", versioned)
+
+    previous = os.path.realpath(out_path) if os.path.islink(out_path) else None
+
+    if os.path.lexists(out_path + ".tmp"):
+        os.remove(out_path + ".tmp")
+    os.symlink(os.path.basename(versioned), out_path + ".tmp")
+    os.replace(out_path + ".tmp", out_path)
+
+    _prune(out_path, keep={os.path.realpath(versioned), previous})
+    return out_path
+
+
+def _prune(out_path, keep):
+    """
+    Remove versioned pairs other than the live and previous one
+    (a reader may still be opening the previous one), and the
+    unversioned sidecar of older exports
+    """
+    stale = [sidecar_path(out_path)]
+    for path in glob.glob(f"{glob.escape(out_path[:-len('.npy')])}.*.npy"):
+        if os.path.realpath(path) not in keep:
+            stale += [path, sidecar_path(path)]
+
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# =====================================================
+# LOAD
+# =====================================================
+def load_mapped(path):
+    """
+    Returns (model, scaler, feature_names, encoder, version)
+    with weights backed by a read-only memory map
+    """
+    # Pin one export: the symlink may be swapped while we read
+    path = os.path.realpath(path)
+    with open(sidecar_path(path)) as f:
+        meta = json.load(f)
+
+    weights = np.load(path, mmap_mode="r")
+    feature_names = meta["feature_names"]
+    n = len(feature_names)
+
+    if weights.shape != (3, n + 1):
+        raise ValueError(f"Weights shape {weights.shape} does not fit {n} features")
+    if hashlib.sha256(weights.tobytes()).hexdigest() != meta["sha256"]:
+        raise ValueError("Weights checksum does not match sidecar")
+
+    model = MappedLinearModel(weights[COEF_ROW, :n], float(weights[COEF_ROW, n]))
+    scaler = MappedScaler(weights[MEAN_ROW, :n], weights[SCALE_ROW, :n])
+    encoder = FeatureEncoder(feature_names, tuple(meta["categorical_cols"]))
+
+    return model, scaler, feature_names, encoder, meta["version"]
+
+
+if __name__ == "__main__":
+    from src.core.risk_engine import load_model
+
+    for model_path in sys.argv[1:] or ["train/model.pkl"]:
+        with open(model_path, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+
+        out = export_weights(*load_model(model_path), version, mapped_path(model_path))
+        print(f"✅ {model_path} -> {out}")
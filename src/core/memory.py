@@ -0,0 +1,201 @@
+"""
+Memory accounting for app workers
+
+Every dashboard session keeps its own copies of the patient frames,
+so worker memory grows with concurrent doctors. This module shows
+how close a worker is to being OOM-killed:
+
+- per-session resident cost: estimated size of the frames and
+  arrays a page registers with track()
+- top allocators per page: tracemalloc snapshot diff around each
+  routed page render
+- process RSS against CDS_MEM_ALERT_MB, logged when crossed
+
+Enable with CDS_MEMPROFILE=1. tracemalloc slows allocation-heavy
+code noticeably, so this is a diagnostic mode, not an always-on one.
+When disabled, track() and track_page() do nothing.
+"""
+
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.getenv("CDS_MEMPROFILE", "0") == "1"
+
+ALERT_MB = float(os.getenv("CDS_MEM_ALERT_MB", "1024"))
+TRACE_FRAMES = int(os.getenv("CDS_MEMPROFILE_FRAMES", "1"))
+TOP_N = int(os.getenv("CDS_MEMPROFILE_TOP", "10"))
+
+# Sessions idle this long are dropped from the report
+SESSION_TTL = float(os.getenv("CDS_MEM_SESSION_TTL", "1800"))
+
+MB = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_sessions = {}      # session id -> {"seen": ts, "objects": {name: bytes}}
+_page_top = {}      # page -> [(location, size_diff, count_diff)]
+_alerting = False
+
+
+# =====================================================
+# SIZE ESTIMATES
+# =====================================================
+def estimate_size(obj):
+    """
+    Bytes held by obj, including string payloads in object columns
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    return sys.getsizeof(obj)
+
+
+def process_rss_mb():
+    """
+    Resident set size of this worker; peak RSS where /proc is missing
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return "main"
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "main"
+
+
+# =====================================================
+# TRACKING
+# =====================================================
+def track(name, obj):
+    """
+    Record the size of an object this session keeps alive, e.g.
+    track("records", df). Only the size is kept, not the object.
+    """
+    if not ENABLED:
+        return
+
+    size = estimate_size(obj)
+    now = time.time()
+
+    with _lock:
+        entry = _sessions.setdefault(_session_id(), {"seen": now, "objects": {}})
+        entry["seen"] = now
+        entry["objects"][name] = size
+
+        for sid in [s for s, e in _sessions.items() if now - e["seen"] > SESSION_TTL]:
+            del _sessions[sid]
+
+
+def _check_alert():
+    global _alerting
+
+    rss = process_rss_mb()
+    if rss is None:
+        return
+
+    over = rss >= ALERT_MB
+    if over and not _alerting:
+        logger.warning(
+            "Worker RSS %.0f MB crossed CDS_MEM_ALERT_MB=%.0f (%d tracked sessions)",
+            rss, ALERT_MB, len(_sessions)
+        )
+    _alerting = over
+
+
+@contextlib.contextmanager
+def track_page(page):
+    """
+    with track_page("doctor_dashboard"): doctor_dashboard()
+
+    Keeps the top allocation sites of the latest render per page.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        stats = after.compare_to(before, "lineno")[:TOP_N]
+
+        with _lock:
+            _page_top[page] = [
+                (str(s.traceback[0]), s.size_diff, s.count_diff) for s in stats
+            ]
+
+        _check_alert()
+
+
+# =====================================================
+# REPORT
+# =====================================================
+def report():
+    """
+    Snapshot for the admin panel:
+    worker totals, per-session cost and per-page top allocators
+    """
+    rss = process_rss_mb()
+    traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+    with _lock:
+        sessions = [
+            {
+                "session": sid[:8],
+                "idle_s": round(time.time() - e["seen"]),
+                "tracked_mb": round(sum(e["objects"].values()) / MB, 2),
+                **{f"{name}_mb": round(size / MB, 2) for name, size in e["objects"].items()},
+            }
+            for sid, e in _sessions.items()
+        ]
+        pages = {
+            page: [
+                {"location": loc, "size_kb": round(size / 1024, 1), "blocks": count}
+                for loc, size, count in stats
+            ]
+            for page, stats in _page_top.items()
+        }
+
+    return {
+        "rss_mb": None if rss is None else round(rss, 1),
+        "alert_mb": ALERT_MB,
+        "alert": rss is not None and rss >= ALERT_MB,
+        "traced_mb": round(traced / MB, 1),
+        "traced_peak_mb": round(peak / MB, 1),
+        "sessions": sorted(sessions, key=lambda r: -r["tracked_mb"]),
+        "pages": pages,
+    }
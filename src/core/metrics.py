@@ -0,0 +1,240 @@
+"""
+Per-stage latency instrumentation
+
+Lightweight spans around each stage of a patient submission
+(scoring, DB, explanation, LLM, PDF, page render), aggregated into
+fixed-bucket histograms per process.
+
+Enable with CDS_METRICS=1. When disabled, @timed returns the function
+unchanged and span() hands back a shared no-op context, so there is
+no per-call cost.
+
+Export (optional, both may be set):
+- CDS_METRICS_PORT=9464   Prometheus text format on http://127.0.0.1:<port>/metrics
+- CDS_METRICS_FILE=path   JSON-lines snapshots to a rotating file
+"""
+
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("CDS_METRICS", "0") == "1"
+
+METRICS_PORT = os.getenv("CDS_METRICS_PORT")
+METRICS_FILE = os.getenv("CDS_METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.getenv("CDS_METRICS_FILE_INTERVAL", "60"))
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        i = bisect.bisect_left(BUCKETS_MS, ms)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total_ms += ms
+
+    def quantile(self, q):
+        """
+        Estimate from buckets, interpolating linearly inside one
+        """
+        with self._lock:
+            counts, count = list(self.counts), self.count
+
+        if not count:
+            return None
+
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS_MS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) else BUCKETS_MS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return float(BUCKETS_MS[-1])
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(stage):
+    h = _histograms.get(stage)
+    if h is None:
+        with _histograms_lock:
+            h = _histograms.setdefault(stage, Histogram())
+    return h
+
+
+# =====================================================
+# SPANS
+# =====================================================
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        histogram(self.stage).observe((time.perf_counter() - self.started) * 1000)
+        return False
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def span(stage):
+    """
+    with span("db.insert"): ...
+    """
+    return _Span(stage) if ENABLED else _NOOP
+
+
+def timed(stage):
+    """
+    Decorator form of span(); a no-op when metrics are disabled
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+def summary():
+    """
+    Rows for the admin panel: stage, count, mean/p50/p95 in ms
+    """
+    rows = []
+    for stage, h in sorted(_histograms.items()):
+        if not h.count:
+            continue
+        rows.append({
+            "stage": stage,
+            "count": h.count,
+            "mean_ms": round(h.total_ms / h.count, 2),
+            "p50_ms": round(h.quantile(0.5), 2),
+            "p95_ms": round(h.quantile(0.95), 2),
+        })
+    return rows
+
+
+def render_prometheus():
+    lines = [
+        "# HELP cds_stage_duration_seconds Time spent per request stage",
+        "# TYPE cds_stage_duration_seconds histogram",
+    ]
+
+    for stage, h in sorted(_histograms.items()):
+        with h._lock:
+            counts, count, total_ms = list(h.counts), h.count, h.total_ms
+
+        cumulative = 0
+        for bound, n in zip(list(BUCKETS_MS) + ["+Inf"], counts):
+            cumulative += n
+            le = bound if bound == "+Inf" else f"{bound / 1000:g}"
+            lines.append(
+                f'cds_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}'
+            )
+        lines.append(f'cds_stage_duration_seconds_sum{{stage="{stage}"}} {total_ms / 1000:.6f}')
+        lines.append(f'cds_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _write_snapshots(path, interval):
+    logger = logging.getLogger("cds.metrics.file")
+    logger.propagate = False
+    logger.addHandler(logging.handlers.RotatingFileHandler(
+        path, maxBytes=5 * 1024 * 1024, backupCount=5
+    ))
+    logger.setLevel(logging.INFO)
+
+    while True:
+        time.sleep(interval)
+        logger.info(json.dumps({"ts": time.time(), "stages": summary()}))
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    """
+    Start the configured exporters once per process (safe to call
+    on every Streamlit rerun)
+    """
+    global _exporters_started
+
+    if not ENABLED:
+        return
+
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+        if METRICS_PORT:
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", int(METRICS_PORT)), _MetricsHandler)
+            except OSError:
+                logging.getLogger(__name__).warning(
+                    "Metrics port %s unavailable; HTTP exporter not started", METRICS_PORT
+                )
+            else:
+                threading.Thread(
+                    target=server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+
+        if METRICS_FILE:
+            threading.Thread(
+                target=_write_snapshots, args=(METRICS_FILE, METRICS_FILE_INTERVAL),
+                name="metrics-file", daemon=True
+            ).start()
@@ -0,0 +1,169 @@
+"""
+Multi-disease screening engine
+
+Encodes the union of all disease features once and scores every
+supported disease in a single pass. Linear (logistic) models are
+folded together with their scalers into one coefficient matrix, so
+all disease probabilities come out of one matrix product.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.feature_encoder import FeatureEncoder
+from src.core.risk_engine import MODEL_PATH, get_holder, scaler_stats, standardize
+from src.core.risk_utils import SUPPORTED_DISEASES
+
+
+DISEASE_MODEL_PATHS = {
+    "diabetes": MODEL_PATH,
+    "hypertension": "train/hypertension_model.pkl",
+    "heart_disease": "train/heart_disease_model.pkl",
+}
+
+
+def _sigmoid(z):
+    # Numerically stable logistic function
+    return np.exp(-np.logaddexp(0.0, -z))
+
+
+def _fold_linear(model, scaler):
+    """
+    Fold StandardScaler statistics into logistic coefficients.
+    Returns (weights, intercept) on raw features, or None when
+    the model/scaler pair cannot be expressed as one linear map.
+    """
+    coef = getattr(model, "coef_", None)
+
+    if coef is None or coef.shape[0] != 1:
+        return None
+    if not hasattr(model, "predict_proba"):
+        return None
+    if getattr(model, "loss", "log_loss") not in ("log_loss", "log"):
+        return None
+
+    weights = np.asarray(coef[0], dtype=float)
+    intercept = float(np.ravel(model.intercept_)[0])
+
+    if scaler is None:
+        return weights, intercept
+
+    stats = scaler_stats(scaler)
+    if stats is None:
+        return None
+
+    mean, scale = stats
+
+    if scale is not None:
+        weights = weights / scale
+    if mean is not None:
+        intercept -= float(np.dot(mean, weights))
+
+    return weights, intercept
+
+
+class MultiDiseaseScorer:
+    """
+    Scores several diseases from one shared feature vector.
+
+    bundles: {disease: (model, scaler, feature_names[, encoder])}
+    """
+
+    def __init__(self, bundles):
+        bundles = {disease: tuple(bundle[:3]) for disease, bundle in bundles.items()}
+        self.diseases = list(bundles)
+
+        self.feature_names = []
+        for _, _, names in bundles.values():
+            for name in names:
+                if name not in self.feature_names:
+                    self.feature_names.append(name)
+
+        self.encoder = FeatureEncoder(self.feature_names)
+
+        index = {name: i for i, name in enumerate(self.feature_names)}
+
+        linear_pos, weights, intercepts = [], [], []
+        self._fallback = []
+
+        for pos, (disease, (model, scaler, names)) in enumerate(bundles.items()):
+            cols = np.array([index[name] for name in names], dtype=int)
+            folded = _fold_linear(model, scaler)
+
+            if folded is None:
+                self._fallback.append((pos, cols, model, scaler))
+                continue
+
+            w = np.zeros(len(self.feature_names))
+            w[cols] = folded[0]
+
+            linear_pos.append(pos)
+            weights.append(w)
+            intercepts.append(folded[1])
+
+        self._linear_pos = np.array(linear_pos, dtype=int)
+        self._W = (
+            np.column_stack(weights)
+            if weights else np.zeros((len(self.feature_names), 0))
+        )
+        self._b = np.array(intercepts, dtype=float)
+
+    def encode(self, records):
+        return self.encoder.transform(records)
+
+    def predict_proba(self, records):
+        """
+        Returns an (n_patients, n_diseases) probability matrix,
+        columns ordered as self.diseases
+        """
+        X = self.encode(records)
+        probs = np.empty((X.shape[0], len(self.diseases)))
+
+        if len(self._linear_pos):
+            probs[:, self._linear_pos] = _sigmoid(X @ self._W + self._b)
+
+        for pos, cols, model, scaler in self._fallback:
+            X_d = standardize(scaler, X[:, cols])
+            probs[:, pos] = model.predict_proba(X_d)[:, 1]
+
+        return probs
+
+    def score(self, patient_data):
+        probs = self.predict_proba([patient_data])[0]
+        return dict(zip(self.diseases, probs.tolist()))
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer():
+    """
+    Scorer over every disease model that has been trained and saved.
+    Rebuilt only when one of the underlying models is hot-swapped.
+    """
+    global _scorer
+
+    bundles = {
+        disease: get_holder(path).current()
+        for disease, path in DISEASE_MODEL_PATHS.items()
+        if disease in SUPPORTED_DISEASES and os.path.exists(path)
+    }
+    versions = tuple((disease, b.version) for disease, b in bundles.items())
+
+    with _scorer_lock:
+        if _scorer is None or _scorer[0] != versions:
+            _scorer = (versions, MultiDiseaseScorer(bundles))
+        return _scorer[1]
+
+
+def score_patient(patient_data):
+    return get_scorer().score(patient_data)
+
+
+def score_patients(records):
+    scorer = get_scorer()
+    return pd.DataFrame(scorer.predict_proba(records), columns=scorer.diseases)
@@ -4,6 +4,11 @@ from reportlab.lib.styles import getSampleStyleSheet
 from datetime import datetime
 import os
 
+from src.core.i18n import get_text
+from src.core.metrics import timed
+
+
+@timed("pdf.generate")
 def generate_pdf(patient_record: dict, explanation: str):
     os.makedirs("reports", exist_ok=True)
 
@@ -16,61 +21,41 @@ def generate_pdf(patient_record: dict, explanation: str):
     styles = getSampleStyleSheet()
     story = []
 
-    # -----------------------------
-    # LANGUAGE TEXT
-    # -----------------------------
-    if language == "Hindi":
-        title = "डायबिटीज़ जोखिम मूल्यांकन रिपोर्ट"
-        subtitle = "AI आधारित निवारक स्वास्थ्य रिपोर्ट"
-        patient_label = "रोगी विवरण"
-        clinical_label = "क्लिनिकल माप"
-        risk_label = "जोखिम परिणाम"
-        ai_label = "AI व्याख्या"
-        disclaimer = (
-            "⚠️ यह रिपोर्ट केवल सूचना हेतु है। "
-            "यह किसी भी प्रकार का चिकित्सीय निदान नहीं है।"
-        )
-    else:
-        title = "Diabetes Risk Assessment Report"
-        subtitle = "AI-based Preventive Health Report"
-        patient_label = "Patient Details"
-        clinical_label = "Clinical Measurements"
-        risk_label = "Risk Outcome"
-        ai_label = "AI Explanation"
-        disclaimer = (
-            "⚠️ This report is for informational purposes only. "
-            "It does not constitute a medical diagnosis."
-        )
+    T = get_text(language)
 
     # -----------------------------
     # HEADER
     # -----------------------------
-    story.append(Paragraph(f"<b>{title}</b>", styles["Title"]))
+    story.append(Paragraph(f"<b>{T['pdf_title']}</b>", styles["Title"]))
     story.append(Spacer(1, 8))
-    story.append(Paragraph(subtitle, styles["Italic"]))
+    story.append(Paragraph(T["pdf_subtitle"], styles["Italic"]))
     story.append(Spacer(1, 12))
 
     # -----------------------------
     # PATIENT DETAILS
     # -----------------------------
-    story.append(Paragraph(f"<b>{patient_label}</b>", styles["Heading2"]))
+    story.append(Paragraph(f"<b>{T['pdf_patient_details']}</b>", styles["Heading2"]))
     story.append(Spacer(1, 6))
 
-    story.append(Paragraph(f"Patient ID: {patient_id}", styles["Normal"]))
-    story.append(Paragraph(f"Gender: {patient_record['gender']}", styles["Normal"]))
-    story.append(Paragraph(f"Age: {patient_record['age']}", styles["Normal"]))
+    story.append(Paragraph(f"{T['patient_id']}: {patient_id}", styles["Normal"]))
+    gender = patient_record["gender"]
+    story.append(Paragraph(
+        f"{T['gender']}: {T.get(f'gender_{gender}', gender)}",
+        styles["Normal"]
+    ))
+    story.append(Paragraph(f"{T['age_short']}: {patient_record['age']}", styles["Normal"]))
     story.append(Spacer(1, 10))
 
     # -----------------------------
     # CLINICAL DATA
     # -----------------------------
-    story.append(Paragraph(f"<b>{clinical_label}</b>", styles["Heading2"]))
+    story.append(Paragraph(f"<b>{T['pdf_clinical']}</b>", styles["Heading2"]))
     story.append(Spacer(1, 6))
 
-    story.append(Paragraph(f"BMI: {patient_record['bmi']}", styles["Normal"]))
+    story.append(Paragraph(f"{T['bmi']}: {patient_record['bmi']}", styles["Normal"]))
     story.append(Paragraph(f"HbA1c: {patient_record['hba1c']} %", styles["Normal"]))
     story.append(Paragraph(
-        f"Blood Glucose: {patient_record['glucose']} mg/dL",
+        f"{T['blood_glucose']}: {patient_record['glucose']} mg/dL",
         styles["Normal"]
     ))
     story.append(Spacer(1, 10))
@@ -78,15 +63,15 @@ def generate_pdf(patient_record: dict, explanation: str):
     # -----------------------------
     # RISK RESULT
     # -----------------------------
-    story.append(Paragraph(f"<b>{risk_label}</b>", styles["Heading2"]))
+    story.append(Paragraph(f"<b>{T['pdf_risk']}</b>", styles["Heading2"]))
     story.append(Spacer(1, 6))
 
     story.append(Paragraph(
-        f"Risk Probability: {patient_record['risk_probability']*100:.2f} %",
+        f"{T['risk_probability']}: {patient_record['risk_probability']*100:.2f} %",
         styles["Normal"]
     ))
     story.append(Paragraph(
-        f"Risk Category: {patient_record['risk_category']}",
+        f"{T['risk_category']}: {patient_record['risk_category']}",
         styles["Normal"]
     ))
     story.append(Spacer(1, 10))
@@ -94,7 +79,7 @@ def generate_pdf(patient_record: dict, explanation: str):
     # -----------------------------
     # AI EXPLANATION
     # -----------------------------
-    story.append(Paragraph(f"<b>{ai_label}</b>", styles["Heading2"]))
+    story.append(Paragraph(f"<b>{T['pdf_ai']}</b>", styles["Heading2"]))
     story.append(Spacer(1, 6))
     story.append(Paragraph(explanation, styles["Normal"]))
     story.append(Spacer(1, 14))
@@ -102,10 +87,10 @@ def generate_pdf(patient_record: dict, explanation: str):
     # -----------------------------
     # DISCLAIMER
     # -----------------------------
-    story.append(Paragraph(disclaimer, styles["Italic"]))
+    story.append(Paragraph(T["pdf_disclaimer"], styles["Italic"]))
     story.append(Spacer(1, 10))
     story.append(Paragraph(
-        f"Generated on: {datetime.now().strftime('%d-%m-%Y %H:%M')}",
+        f"{T['pdf_generated_on']}: {datetime.now().strftime('%d-%m-%Y %H:%M')}",
         styles["Normal"]
     ))
 
@@ -0,0 +1,94 @@
+"""
+Opt-in per-rerun profiler capture
+
+With CDS_PROFILE=1 every routed Streamlit rerun runs under cProfile.
+Reruns slower than CDS_PROFILE_THRESHOLD_MS are saved as
+<page>-<timestamp>-<ms>ms.prof in CDS_PROFILE_DIR; faster ones are
+discarded. Only the newest CDS_PROFILE_KEEP files younger than
+CDS_PROFILE_MAX_AGE_DAYS are retained.
+
+Inspect with: python -m pstats profiles/<file>.prof  (or snakeviz)
+"""
+
+import contextlib
+import cProfile
+import glob
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+ENABLED = os.getenv("CDS_PROFILE", "0") == "1"
+
+THRESHOLD_MS = float(os.getenv("CDS_PROFILE_THRESHOLD_MS", "1000"))
+PROFILE_DIR = os.getenv("CDS_PROFILE_DIR", "profiles")
+KEEP = int(os.getenv("CDS_PROFILE_KEEP", "50"))
+MAX_AGE_DAYS = float(os.getenv("CDS_PROFILE_MAX_AGE_DAYS", "7"))
+
+logger = logging.getLogger(__name__)
+
+# cProfile cannot run two profilers at once (process-wide on 3.12+);
+# concurrent reruns that lose the race run unprofiled
+_active = threading.Lock()
+
+
+def _prune():
+    files = sorted(
+        glob.glob(os.path.join(PROFILE_DIR, "*.prof")),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    cutoff = time.time() - MAX_AGE_DAYS * 86400
+
+    for i, path in enumerate(files):
+        if i >= KEEP or os.path.getmtime(path) < cutoff:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+
+def _save(profiler, page, elapsed_ms):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    name = f"{page}-{datetime.now():%Y%m%d-%H%M%S-%f}-{int(elapsed_ms)}ms.prof"
+    path = os.path.join(PROFILE_DIR, name)
+
+    profiler.dump_stats(path)
+    logger.warning("Slow rerun on %s (%.0f ms); profile saved to %s", page, elapsed_ms, path)
+
+    _prune()
+
+
+@contextlib.contextmanager
+def profile_rerun(page):
+    """
+    with profile_rerun("doctor_dashboard"): doctor_dashboard()
+    """
+    if not ENABLED or not _active.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool is active in this process
+        _active.release()
+        yield
+        return
+
+    try:
+        # st.rerun()/st.stop() raise through here; still measured
+        yield
+    finally:
+        profiler.disable()
+        _active.release()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= THRESHOLD_MS:
+            try:
+                _save(profiler, page, elapsed_ms)
+            except OSError:
+                logger.exception("Could not save profile for %s", page)
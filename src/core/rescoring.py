@@ -0,0 +1,149 @@
+"""
+Resumable background rescoring of historical assessments
+
+Walks patient_records in primary-key chunks, scores each chunk with
+the batch path and writes the results to patient_scores under the
+live model's version. Progress is checkpointed per model version in
+the same transaction as the scores, so an interrupted run resumes
+where it stopped. Between chunks the job sleeps in proportion to
+the work it just did, leaving the SQLite writer lock free for live
+inserts.
+
+Run once:        python -m src.core.rescoring
+Keep following:  python -m src.core.rescoring --watch
+"""
+
+import argparse
+import logging
+import time
+
+from src.core.db import get_connection, init_db, record_to_patient_data
+from src.core.risk_engine import compute_risk_batch, current_model
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = [
+    "gender", "age", "hypertension", "heart_disease",
+    "smoking_history", "bmi", "hba1c", "glucose"
+]
+
+
+def _checkpoint(conn, model_version):
+    row = conn.execute(
+        "SELECT last_id FROM rescore_progress WHERE model_version = ?",
+        (model_version,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def rescore(bundle=None, chunk_size=500, duty_cycle=0.5, busy_timeout_ms=5000):
+    """
+    Rescore every record not yet scored by bundle's model version.
+
+    duty_cycle: fraction of wall time spent working; after a chunk that
+    took t seconds the job sleeps t * (1 - duty_cycle) / duty_cycle.
+
+    Returns the number of records scored in this run.
+    """
+    if not 0 < duty_cycle <= 1:
+        raise ValueError(f"duty_cycle must be in (0, 1], got {duty_cycle}")
+
+    bundle = bundle or current_model()
+    version = bundle.version
+
+    conn = get_connection()
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+
+    last_id = _checkpoint(conn, version)
+    scored = 0
+
+    try:
+        while True:
+            started = time.perf_counter()
+
+            rows = conn.execute(
+                f"SELECT id, {', '.join(FEATURE_COLUMNS)} FROM patient_records "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            ).fetchall()
+
+            if not rows:
+                break
+
+            # Rows with missing inputs cannot be scored; skip them
+            complete = [row for row in rows if None not in row]
+            results = []
+
+            if complete:
+                records = [
+                    record_to_patient_data(dict(zip(FEATURE_COLUMNS, row[1:])))
+                    for row in complete
+                ]
+                probs, categories = compute_risk_batch(records, bundle)
+                results = [
+                    (row[0], version, round(float(p), 3), c)
+                    for row, p, c in zip(complete, probs, categories)
+                ]
+
+            last_id = rows[-1][0]
+
+            # Scores and checkpoint commit together
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO patient_scores "
+                    "(record_id, model_version, risk_probability, risk_category) "
+                    "VALUES (?, ?, ?, ?)",
+                    results
+                )
+                conn.execute(
+                    "INSERT INTO rescore_progress (model_version, last_id) VALUES (?, ?) "
+                    "ON CONFLICT(model_version) DO UPDATE SET "
+                    "last_id = excluded.last_id, updated_at = CURRENT_TIMESTAMP",
+                    (version, last_id)
+                )
+
+            scored += len(results)
+
+            elapsed = time.perf_counter() - started
+            time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    finally:
+        conn.close()
+
+    if scored:
+        logger.info("Rescored %d records with model %s", scored, version)
+    return scored
+
+
+def _duty_cycle(value):
+    value = float(value)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError(f"must be in (0, 1], got {value}")
+    return value
+
+
+def watch(poll_interval=30, **kwargs):
+    """
+    Keep rescoring: picks up hot-swapped models and new records
+    """
+    while True:
+        rescore(**kwargs)
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Rescore stored assessments")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--duty-cycle", type=_duty_cycle, default=0.5,
+                        help="Fraction of wall time spent working, in (0, 1]")
+    parser.add_argument("--watch", action="store_true")
+    parser.add_argument("--poll-interval", type=float, default=30)
+    args = parser.parse_args()
+
+    init_db()
+
+    if args.watch:
+        watch(args.poll_interval, chunk_size=args.chunk_size, duty_cycle=args.duty_cycle)
+    else:
+        print(f"Rescored {rescore(chunk_size=args.chunk_size, duty_cycle=args.duty_cycle)} records")
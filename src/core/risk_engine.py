@@ -1,25 +1,275 @@
+import hashlib
+import logging
+import os
 import pickle
-import pandas as pd
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from src.core.banding import RISK_CATEGORY_BANDS
+from src.core.feature_encoder import FeatureEncoder
+from src.core.mapped_model import load_mapped, mapped_path
+from src.core.metrics import timed
 
 MODEL_PATH = "train/model.pkl"
 
-with open(MODEL_PATH, "rb") as f:
-    model, scaler, feature_names = pickle.load(f)
+# "mapped" serves linear models from shared read-only weight files
+# (see mapped_model) when they have been exported; "pickle" always
+# unpickles the sklearn artifact
+MODEL_FORMAT = os.getenv("CDS_MODEL_FORMAT", "pickle")
+
+# Seconds between artifact checks; 0 disables hot reload
+RELOAD_INTERVAL = float(os.getenv("CDS_MODEL_RELOAD_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+ModelBundle = namedtuple(
+    "ModelBundle", ["model", "scaler", "feature_names", "encoder", "version"]
+)
+
+
+def _unpack(bundle):
+    # Older artifacts have no encoder: rebuild it from the feature names
+    if len(bundle) == 3:
+        model, scaler, feature_names = bundle
+        return model, scaler, feature_names, FeatureEncoder(feature_names)
+
+    return tuple(bundle)
+
+
+def load_model(path):
+    """
+    Returns (model, scaler, feature_names, encoder).
+    Older artifacts without an encoder get one rebuilt
+    from their feature names.
+    """
+    with open(path, "rb") as f:
+        return _unpack(pickle.load(f))
+
+
+def scaler_stats(scaler):
+    """
+    (mean, scale) a fitted StandardScaler applies; either may be None.
+    Returns None for scalers that are not mean/scale based.
+    """
+    if not hasattr(scaler, "mean_"):
+        return None
+
+    mean = getattr(scaler, "mean_", None) if getattr(scaler, "with_mean", True) else None
+    scale = getattr(scaler, "scale_", None) if getattr(scaler, "with_std", True) else None
+    return mean, scale
+
+
+def standardize(scaler, X):
+    """
+    Apply a fitted scaler to a NumPy array.
+    StandardScaler is applied directly from its statistics: same
+    arithmetic as scaler.transform, without the DataFrame round trip.
+    """
+    if scaler is None:
+        return X
+
+    stats = scaler_stats(scaler)
+    if stats is None:
+        return scaler.transform(X)
+
+    mean, scale = stats
+    if mean is not None:
+        X = X - mean
+    if scale is not None:
+        X = X / scale
+    return X
+
+
+# =====================================================
+# MODEL HOLDER (HOT RELOAD WITH ATOMIC SWAP)
+# =====================================================
+class ModelHolder:
+    """
+    Owns the live model for one artifact path.
+
+    A daemon thread polls the file's mtime/size. When it changes, the
+    new artifact is loaded and validated off the request path, then
+    swapped in with a single reference assignment. Callers take one
+    snapshot via current() per request, so in-flight requests finish
+    on the model they started with.
+    """
+
+    def __init__(self, path, interval=RELOAD_INTERVAL, fallback=None):
+        self.path = path
+        self.interval = interval
+
+        self._stamp = self._read_stamp()
+        try:
+            self._bundle = self._load()
+        except Exception:
+            # A worker must still start when the mapped weights are
+            # unreadable: serve the pickle it was exported from
+            if fallback is None:
+                raise
+            logger.exception("Could not load %s; serving %s instead", path, fallback)
+            self.path = fallback
+            self._stamp = self._read_stamp()
+            self._bundle = self._load()
+        self._lock = threading.Lock()
+
+        if interval > 0:
+            threading.Thread(
+                target=self._watch, name=f"model-watch:{path}", daemon=True
+            ).start()
+
+    def current(self):
+        return self._bundle
+
+    def _read_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        if self.path.endswith(".npy"):
+            model, scaler, feature_names, encoder, version = load_mapped(self.path)
+            bundle = ModelBundle(model, scaler, list(feature_names), encoder, version)
+            self._validate(bundle)
+            return bundle
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        model, scaler, feature_names, encoder = _unpack(pickle.loads(data))
+        bundle = ModelBundle(
+            model, scaler, list(feature_names), encoder,
+            hashlib.sha256(data).hexdigest()[:12]
+        )
+        self._validate(bundle)
+        return bundle
+
+    @staticmethod
+    def _validate(bundle):
+        """
+        Reject artifacts that cannot score: column mismatch or a
+        probe prediction that is not a probability
+        """
+        if bundle.encoder.feature_names != bundle.feature_names:
+            raise ValueError("Encoder columns do not match model feature names")
+
+        n_features = getattr(bundle.model, "n_features_in_", len(bundle.feature_names))
+        if n_features != len(bundle.feature_names):
+            raise ValueError(
+                f"Model expects {n_features} features, "
+                f"artifact lists {len(bundle.feature_names)}"
+            )
+
+        X = standardize(bundle.scaler, bundle.encoder.transform_one({})[np.newaxis, :])
+        prob = bundle.model.predict_proba(X)[0][1]
+        if not 0.0 <= prob <= 1.0:
+            raise ValueError(f"Probe prediction out of range: {prob}")
+
+    def check_reload(self):
+        """
+        Reload if the artifact changed. Returns True on a swap.
+        A broken artifact is logged and the old model stays live.
+        """
+        with self._lock:
+            try:
+                stamp = self._read_stamp()
+            except OSError:
+                return False
+
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+
+            try:
+                bundle = self._load()
+            except Exception:
+                logger.exception("Model reload failed for %s; keeping %s",
+                                 self.path, self._bundle.version)
+                return False
+
+            if bundle.version == self._bundle.version:
+                return False
+
+            self._bundle = bundle
+            logger.info("Model %s swapped to version %s", self.path, bundle.version)
+            return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            self.check_reload()
+
+
+_holders = {}
+_holders_lock = threading.Lock()
+
+
+def resolve_artifact(path):
+    """
+    The file actually served for a model path under MODEL_FORMAT
+    """
+    if MODEL_FORMAT == "mapped" and path.endswith(".pkl"):
+        weights = mapped_path(path)
+        if os.path.exists(weights):
+            return weights
+    return path
+
+
+def get_holder(path):
+    """
+    One holder (and one watcher thread) per artifact per process
+    """
+    artifact = resolve_artifact(path)
+
+    with _holders_lock:
+        if artifact not in _holders:
+            _holders[artifact] = ModelHolder(
+                artifact, fallback=path if artifact != path else None
+            )
+        return _holders[artifact]
+
+
+MODEL = get_holder(MODEL_PATH)
+
+
+def current_model():
+    return MODEL.current()
+
+
+# =====================================================
+# SCORING
+# =====================================================
+def risk_category(prob):
+    return RISK_CATEGORY_BANDS.label(prob)
+
+
+@timed("risk.compute")
+def compute_risk(patient_data, bundle=None):
+    bundle = bundle or MODEL.current()
+
+    X = bundle.encoder.transform_one(patient_data)[np.newaxis, :]
+
+    X_scaled = standardize(bundle.scaler, X)
+    prob = bundle.model.predict_proba(X_scaled)[0][1]
+
+    risk = risk_category(prob)
+
+    return prob, risk, bundle.model, bundle.feature_names
 
-def compute_risk(patient_data):
-    df = pd.DataFrame([patient_data])
 
-    df_encoded = pd.get_dummies(df)
-    df_encoded = df_encoded.reindex(columns=feature_names, fill_value=0)
+@timed("risk.compute_batch")
+def compute_risk_batch(records, bundle=None):
+    """
+    Score many patients with one model call
+    Returns (probabilities, risk categories)
+    """
+    bundle = bundle or MODEL.current()
 
-    X_scaled = scaler.transform(df_encoded)
-    prob = model.predict_proba(X_scaled)[0][1]
+    X = bundle.encoder.transform(records)
 
-    if prob < 0.3:
-        risk = "Low"
-    elif prob < 0.6:
-        risk = "Moderate"
-    else:
-        risk = "High"
+    X_scaled = standardize(bundle.scaler, X)
+    probs = bundle.model.predict_proba(X_scaled)[:, 1]
 
-    return prob, risk, model, feature_names
+    categories = RISK_CATEGORY_BANDS.labels(RISK_CATEGORY_BANDS.codes(probs))
+    return probs, categories.tolist()
@@ -1,5 +1,7 @@
 # core/risk_utils.py
 
+from src.core.banding import RISK_CATEGORY_BANDS
+
 
 SUPPORTED_DISEASES = [
     "diabetes",
@@ -16,30 +18,14 @@ def get_features_for_disease(disease: str):
     return feature_map.get(disease, [])
 
 def get_risk_ui(risk_level):
-    risk_level = str(risk_level).lower()
-
-    if risk_level == "low":
-        return {
-            "label": "Low Risk",
-            "color": "#16a34a",
-            "emoji": "🟢",
-            "message": "Low diabetes risk. Maintain healthy lifestyle."
-        }
-
-    if risk_level == "moderate":
-        return {
-            "label": "Moderate Risk",
-            "color": "#f59e0b",
-            "emoji": "🟡",
-            "message": "Moderate risk detected. Lifestyle improvement advised."
-        }
+    band = RISK_CATEGORY_BANDS.by_label(risk_level)
 
-    if risk_level == "high":
+    if band is not None:
         return {
-            "label": "High Risk",
-            "color": "#dc2626",
-            "emoji": "🔴",
-            "message": "High risk detected. Clinical follow-up recommended."
+            "label": f"{band['label']} Risk",
+            "color": band["color"],
+            "emoji": band["emoji"],
+            "message": band["message"]
         }
 
     return {
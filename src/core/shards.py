@@ -0,0 +1,87 @@
+"""
+Per-clinic database shards
+
+With CDS_SHARDS=north,south every clinic gets its own SQLite file
+(data/shards/<clinic>.db), so clinics no longer queue behind one
+writer lock. Unset, there is a single shard on CDS_DB_PATH, as
+before.
+
+The shard for the running code is a context variable:
+
+- app.py routes each rerun to the logged-in doctor's clinic
+  (CDS_USER_SHARDS in auth.py) or, for patient kiosks, ?clinic=<shard>
+- jobs and CLIs (alerts, archive, rescoring, ...) run on CDS_SHARD,
+  default the first shard
+- fan_out() runs a function once per shard in parallel threads for
+  organization-wide views
+
+Patient ID sequences and drift counts are organization-wide and live
+in one global database (CDS_GLOBAL_DB_PATH).
+"""
+
+import contextlib
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+SHARDS = [s.strip() for s in os.getenv("CDS_SHARDS", "").split(",") if s.strip()]
+SHARDED = bool(SHARDS)
+if not SHARDED:
+    SHARDS = ["default"]
+
+DEFAULT_SHARD = SHARDS[0]
+SHARD_DIR = os.getenv("CDS_SHARD_DIR", "data/shards")
+
+_current = contextvars.ContextVar("shard", default=os.getenv("CDS_SHARD", DEFAULT_SHARD))
+
+
+def route(name):
+    """
+    Shard for a clinic name; unknown or missing -> DEFAULT_SHARD
+    """
+    return name if name in SHARDS else DEFAULT_SHARD
+
+
+def current_shard():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use_shard(name):
+    """
+    with use_shard("north"): ...   (every get_connection() inside)
+    """
+    token = _current.set(route(name))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def shard_path(shard=None):
+    return os.path.join(SHARD_DIR, f"{shard or current_shard()}.db")
+
+
+def shard_dir(base, shard=None):
+    """
+    Per-shard subdirectory for files derived from a shard
+    (archive, analytics snapshots); `base` itself when unsharded
+    """
+    if not SHARDED:
+        return base
+    return os.path.join(base, shard or current_shard())
+
+
+def fan_out(fn, shards=None, max_workers=None):
+    """
+    {shard: fn()} with fn run under each shard in parallel.
+    sqlite3 releases the GIL while a query runs, so threads overlap.
+    """
+    shards = list(shards or SHARDS)
+
+    def run(shard):
+        with use_shard(shard):
+            return fn()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(shards)) as pool:
+        return dict(zip(shards, pool.map(run, shards)))
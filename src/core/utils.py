@@ -1,7 +1,47 @@
-import random
+import os
+import threading
 from datetime import datetime
 
+from src.core.db import reserve_id_block
+
+# Sequence numbers reserved per DB round trip
+ID_BLOCK_SIZE = int(os.getenv("CDS_ID_BLOCK_SIZE", "100"))
+
+
+class PatientIdAllocator:
+    """
+    Unique, human-readable patient IDs: PID-YYYYMMDD-00001
+
+    Each process reserves a block of the day's sequence from the
+    database and hands IDs out from memory, so the DB is hit once
+    per block rather than once per ID. Blocks never overlap across
+    sessions or worker processes; numbers left in a block when a
+    process exits are skipped, never reused.
+    """
+
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 1
+        self._last = 0
+
+    def next_id(self):
+        day = datetime.now().strftime("%Y%m%d")
+
+        with self._lock:
+            if day != self._day or self._next > self._last:
+                self._next, self._last = reserve_id_block(day, self.block_size)
+                self._day = day
+
+            value = self._next
+            self._next += 1
+
+        return f"PID-{day}-{value:05d}"
+
+
+_allocator = PatientIdAllocator()
+
+
 def generate_patient_id():
-    date_part = datetime.now().strftime("%Y%m%d")
-    random_part = random.randint(1000, 9999)
-    return f"PID-{date_part}-{random_part}"
+    return _allocator.next_id()
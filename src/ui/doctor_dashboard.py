@@ -1,12 +1,20 @@
+from datetime import timedelta
+
 import streamlit as st
-import pandas as pd
 from .styles import apply_styles
 
-from src.core.db import get_connection
+from auth import is_admin
+
+from src.core.db import load_patient_history, load_records, record_to_patient_data
+from src.core.risk_engine import current_model
+from src.core.alerts import load_alerts
+from src.core.banding import RISK_CATEGORY_BANDS
+from src.core import cohort
 from src.core.decision_support import next_steps
 from src.core.genai_explainer import explain
 from src.core.pdf_report import generate_pdf
 from src.core.i18n import get_text
+from src.core import drift, export, memory, metrics, shards
 
 apply_styles()
 
@@ -25,30 +33,33 @@ def doctor_dashboard():
     st.markdown(f"""
     <div class="card">
         <div class="section-title">👨‍⚕️ {T['dashboard']}</div>
-        <p style="color:#6b7280">
-            {"Clinical decision support & longitudinal patient monitoring"
-             if lang == "English"
-             else "क्लिनिकल निर्णय सहायता और रोगी निगरानी"}
-        </p>
+        <p style="color:#6b7280">{T['dashboard_subtitle']}</p>
     </div>
     """, unsafe_allow_html=True)
 
+    # ===============================
+    # CLINIC (ADMINS MAY SWITCH)
+    # ===============================
+    if shards.SHARDED and is_admin(st.session_state.get("doctor")):
+        st.selectbox(
+            "Clinic",
+            shards.SHARDS,
+            index=shards.SHARDS.index(shards.current_shard()),
+            key="clinic_select",
+            # Runs before the next rerun, so app.py routes to the new shard
+            on_change=lambda: st.session_state.update(shard=st.session_state.clinic_select),
+        )
+
     # ===============================
     # LOAD DATA
     # ===============================
-    conn = get_connection()
-    df = pd.read_sql(
-        "SELECT * FROM patient_records ORDER BY created_at DESC",
-        conn
-    )
-    conn.close()
+    # Rescored values for the live model replace older scores
+    model_version = current_model().version
+    df = load_records(model_version)
+    memory.track("records", df)
 
     if df.empty:
-        st.info(
-            "No patient records available yet."
-            if lang == "English"
-            else "अभी तक कोई रोगी रिकॉर्ड उपलब्ध नहीं है।"
-        )
+        st.info(T["no_records"])
         return
 
     # ===============================
@@ -63,22 +74,75 @@ def doctor_dashboard():
     # ✅ FIXED HERE
     st.dataframe(df, use_container_width=True)
 
+    # ===============================
+    # EXPORT (STREAMED FROM SQLITE)
+    # ===============================
+    with st.expander(f"⬇️ {T['export_records']}"):
+        export_panel(T, model_version)
+
+    # ===============================
+    # CLINIC OVERVIEW (PRE-AGGREGATED)
+    # ===============================
+    st.markdown(f"""
+    <div class="card">
+        <div class="section-title">📊 {T['clinic_overview']}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.caption(T["risk_counts_by_day"])
+    st.bar_chart(cohort.risk_counts_by_day())
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption(T["hba1c_by_age_band"])
+        st.dataframe(cohort.mean_hba1c_by_age_band(), use_container_width=True)
+    with col2:
+        st.caption(T["high_risk_by_language"])
+        st.dataframe(cohort.high_risk_share_by_language(), use_container_width=True)
+
+    # ===============================
+    # RISING-RISK WORKLIST
+    # ===============================
+    st.markdown(f"""
+    <div class="card">
+        <div class="section-title">🚨 {T['rising_risk']}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    page_size = 25
+    page = st.session_state.get("alerts_page", 1)
+    alerts, total = load_alerts(page - 1, page_size)
+
+    pages = max(1, (total + page_size - 1) // page_size)
+    if page > pages:
+        st.session_state.alerts_page = page = pages
+        alerts, total = load_alerts(page - 1, page_size)
+
+    if total:
+        st.dataframe(alerts, use_container_width=True)
+        st.number_input(
+            f"{T['page']} (1–{pages})", min_value=1, max_value=pages,
+            key="alerts_page"
+        )
+    else:
+        st.info(T["no_alerts"])
+
     # ===============================
     # SELECT PATIENT
     # ===============================
     st.markdown(f"""
     <div class="card">
-        <div class="section-title">🔍 
-            {"Review Patient History" if lang == "English" else "रोगी का इतिहास देखें"}
-        </div>
+        <div class="section-title">🔍 {T['review_history']}</div>
     </div>
     """, unsafe_allow_html=True)
 
     patient_ids = df["patient_id"].unique().tolist()
     selected_patient = st.selectbox(T["select_patient"], patient_ids)
 
-    patient_df = df[df["patient_id"] == selected_patient].sort_values("created_at")
+    # Indexed per-patient query instead of filtering every record
+    patient_df = load_patient_history(selected_patient, model_version)
     latest = patient_df.iloc[-1]
+    memory.track("patient_history", patient_df)
 
     # ===============================
     # RISK OVERVIEW CARD
@@ -93,10 +157,7 @@ def doctor_dashboard():
     with col1:
         st.metric(T["patient_id"], latest["patient_id"])
     with col2:
-        st.metric(
-            "Risk Probability" if lang == "English" else "जोखिम प्रतिशत",
-            f"{latest['risk_probability']*100:.2f}%"
-        )
+        st.metric(T["risk_probability"], f"{latest['risk_probability']*100:.2f}%")
     with col3:
         st.metric(T["risk_category"], latest["risk_category"])
 
@@ -114,40 +175,24 @@ def doctor_dashboard():
         col1, col2 = st.columns(2)
 
         with col1:
-            st.markdown(
-                "**Diabetes Risk (%) Over Time**"
-                if lang == "English"
-                else "**समय के साथ डायबिटीज जोखिम (%)**"
-            )
+            st.markdown(f"**{T['chart_risk']}**")
             st.line_chart(
                 patient_df.set_index("created_at")["risk_probability"] * 100
             )
 
         with col2:
-            st.markdown(
-                "**HbA1c Trend Over Time**"
-                if lang == "English"
-                else "**HbA1c का ट्रेंड**"
-            )
+            st.markdown(f"**{T['chart_hba1c']}**")
             st.line_chart(
                 patient_df.set_index("created_at")["hba1c"]
             )
 
-        st.markdown(
-            "**BMI Trend Over Time**"
-            if lang == "English"
-            else "**BMI का ट्रेंड**"
-        )
+        st.markdown(f"**{T['chart_bmi']}**")
         st.line_chart(
             patient_df.set_index("created_at")["bmi"]
         )
 
     else:
-        st.info(
-            "Not enough historical data to show trends."
-            if lang == "English"
-            else "ट्रेंड दिखाने के लिए पर्याप्त डेटा उपलब्ध नहीं है।"
-        )
+        st.info(T["not_enough_history"])
 
     # ===============================
     # AI CLINICAL EXPLANATION
@@ -158,16 +203,7 @@ def doctor_dashboard():
     </div>
     """, unsafe_allow_html=True)
 
-    patient_data = {
-        "gender": latest["gender"],
-        "age": latest["age"],
-        "hypertension": latest["hypertension"],
-        "heart_disease": latest["heart_disease"],
-        "smoking_history": latest["smoking_history"],
-        "bmi": latest["bmi"],
-        "HbA1c_level": latest["hba1c"],
-        "blood_glucose_level": latest["glucose"]
-    }
+    patient_data = record_to_patient_data(latest)
 
     ai_explanation = explain(
         patient_data=patient_data,
@@ -196,19 +232,12 @@ def doctor_dashboard():
     # ===============================
     st.markdown(f"""
     <div class="card">
-        <div class="section-title">📄 
-            {"Patient Report" if lang == "English" else "रोगी रिपोर्ट"}
-        </div>
+        <div class="section-title">📄 {T['patient_report']}</div>
     </div>
     """, unsafe_allow_html=True)
 
     # ✅ FIXED HERE
-    if st.button(
-        "📥 Generate & Download PDF Report"
-        if lang == "English"
-        else "📥 रिपोर्ट डाउनलोड करें",
-        use_container_width=True
-    ):
+    if st.button(T["generate_pdf"], use_container_width=True):
 
         pdf_path = generate_pdf(
             latest.to_dict(),
@@ -223,8 +252,94 @@ def doctor_dashboard():
                 mime="application/pdf"
             )
 
-    st.caption(
-        "⚠️ This dashboard provides clinical decision support only."
-        if lang == "English"
-        else "⚠️ यह डैशबोर्ड केवल क्लिनिकल निर्णय सहायता के लिए है।"
+    # ===============================
+    # PERFORMANCE (ADMIN ONLY)
+    # ===============================
+    if is_admin(st.session_state.get("doctor")):
+        admin_panel(T)
+
+    st.caption(T["dashboard_disclaimer"])
+
+
+def export_panel(T, model_version):
+    categories = [band["label"] for band in RISK_CATEGORY_BANDS.bands]
+
+    col1, col2, col3 = st.columns(3)
+    period = col1.date_input(T["export_period"], value=(), key="export_period")
+    chosen = col2.multiselect(T["export_categories"], categories, key="export_categories")
+    fmt = col3.radio(T["export_format"], list(export.FORMATS), horizontal=True, key="export_format")
+
+    start = end = None
+    if len(period) == 2:
+        start, end = period[0].isoformat(), (period[1] + timedelta(days=1)).isoformat()
+
+    # Deferred: rows are read only when clicked, in Streamlit's
+    # download thread, so the shard is captured here
+    shard = shards.current_shard()
+
+    def build():
+        with shards.use_shard(shard):
+            return export.to_file(export.export(fmt, model_version, start, end, chosen))
+
+    st.download_button(
+        label=T["export_download"],
+        data=build,
+        file_name=f"patient_records.{fmt}",
+        mime=export.FORMATS[fmt],
+        on_click="ignore",
     )
+
+
+def admin_panel(T):
+    with st.expander(f"⏱️ {T['admin_latency']}"):
+        if not metrics.ENABLED:
+            st.info(T["admin_metrics_disabled"])
+        else:
+            rows = metrics.summary()
+            if rows:
+                st.dataframe(rows, use_container_width=True)
+            else:
+                st.info(T["admin_no_requests"])
+
+    if shards.SHARDED:
+        with st.expander(f"🏥 {T['admin_organization']}"):
+            st.dataframe(cohort.clinic_summary(), use_container_width=True)
+
+    with st.expander(f"📈 {T['admin_drift']}"):
+        reference = drift.reference_info()
+        if reference is None:
+            st.info(T["admin_no_drift_reference"])
+        else:
+            rows = drift.report()
+            st.caption(T["admin_drift_window"].format(
+                days=drift.WINDOW_DAYS, source=reference["source"],
+                rows=f"{reference['rows']:,}", created_at=reference["created_at"]
+            ))
+            st.dataframe(rows, use_container_width=True)
+
+            drifting = [row["feature"] for row in rows if row["status"] == "drift"]
+            if drifting:
+                st.error(T["admin_drift_detected"].format(features=", ".join(drifting)))
+
+    with st.expander(f"🧠 {T['admin_memory']}"):
+        if not memory.ENABLED:
+            st.info(T["admin_memory_disabled"])
+            return
+
+        mem = memory.report()
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric(T["admin_resident_mb"], mem["rss_mb"],
+                    help=T["admin_alert_at"].format(mb=f"{mem['alert_mb']:.0f}"))
+        col2.metric(T["admin_traced_mb"], mem["traced_mb"])
+        col3.metric(T["admin_traced_peak_mb"], mem["traced_peak_mb"])
+
+        if mem["alert"]:
+            st.error(T["admin_memory_alert"].format(mb=f"{mem['alert_mb']:.0f}"))
+
+        st.markdown(f"**{T['admin_session_frames']}**")
+        st.dataframe(mem["sessions"], use_container_width=True)
+
+        for page, rows in mem["pages"].items():
+            st.markdown(f"**{T['admin_top_allocators'].format(page=page)}**")
+            st.dataframe(rows, use_container_width=True)
@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import authenticate
+from auth import authenticate, user_shard
 
 def login_page():
     st.title("👨‍⚕️ Doctor Login")
@@ -14,10 +14,13 @@ def login_page():
     password = st.text_input("Password", type="password")
 
     if st.button("Login"):
-        if authenticate(username.strip(), password.strip()):
+        if not authenticate(username.strip(), password.strip()):
+            st.error("❌ Invalid credentials")
+        elif user_shard(username.strip()) is None:
+            st.error("❌ No clinic is assigned to this account")
+        else:
             st.session_state["doctor"] = username.strip()
+            st.session_state["shard"] = user_shard(username.strip())
             st.session_state["page"] = "Doctor Dashboard"
             st.success("✅ Login successful")
             st.rerun()
-        else:
-            st.error("❌ Invalid credentials")
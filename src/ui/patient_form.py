@@ -2,62 +2,17 @@ import streamlit as st
 import re
 from .styles import apply_styles
 
-from src.core.risk_engine import compute_risk
+from src.core.risk_engine import compute_risk, current_model
+from src.core.banding import SEVERITY_BANDS
 from src.core.genai_explainer import explain
-from src.core.db import get_connection
+from src.core.db import insert_patient_record
+from src.core.alerts import update_alerts
 from src.core.utils import generate_patient_id
-from src.core.i18n import get_text
+from src.core.i18n import ENABLED_LANGUAGES, get_text
+from src.core import drift
 
 apply_styles()
 
-# =====================================================
-# RISK SEVERITY + UI ENGINE (SAFE & LOCAL)
-# =====================================================
-def get_risk_ui(prob):
-    pct = prob * 100
-
-    if pct < 20:
-        return {
-            "label": "Normal",
-            "emoji": "🟢",
-            "color": "#22c55e",
-            "message": "No immediate diabetes risk. Maintain healthy habits.",
-            "urgency": "None"
-        }
-    elif pct < 40:
-        return {
-            "label": "Mild Risk",
-            "emoji": "🟡",
-            "color": "#eab308",
-            "message": "Early risk detected. Lifestyle changes recommended.",
-            "urgency": "Low"
-        }
-    elif pct < 60:
-        return {
-            "label": "Moderate Risk",
-            "emoji": "🟠",
-            "color": "#f97316",
-            "message": "Moderate diabetes risk. Regular monitoring advised.",
-            "urgency": "Medium"
-        }
-    elif pct < 80:
-        return {
-            "label": "High Risk",
-            "emoji": "🔴",
-            "color": "#ef4444",
-            "message": "High risk detected. Doctor consultation advised.",
-            "urgency": "High"
-        }
-    else:
-        return {
-            "label": "Critical Risk",
-            "emoji": "🚨",
-            "color": "#7f1d1d",
-            "message": "Critical condition. Immediate medical attention required.",
-            "urgency": "Critical"
-        }
-
-
 # =====================================================
 # MAIN PATIENT FORM
 # =====================================================
@@ -69,19 +24,30 @@ def patient_form():
     if "step" not in st.session_state:
         st.session_state.step = "language"
 
+    # Single-language deployments skip the picker
+    if st.session_state.step == "language" and len(ENABLED_LANGUAGES) == 1:
+        st.session_state.language = ENABLED_LANGUAGES[0]
+        st.session_state.step = "personal"
+
     # =================================================
     # STEP 1: LANGUAGE SELECTION
     # =================================================
     if st.session_state.step == "language":
 
-        st.markdown("""
+        catalogs = [get_text(lang) for lang in ENABLED_LANGUAGES]
+
+        st.markdown(f"""
         <div class="card">
-            <div class="section-title">🌐 Select Language / भाषा चुनें</div>
+            <div class="section-title">🌐 {" / ".join(text["select_language"] for text in catalogs)}</div>
         """, unsafe_allow_html=True)
 
-        language = st.radio("Language / भाषा", ["English", "Hindi"])
+        language = st.radio(
+            " / ".join(text["select_language"] for text in catalogs),
+            ENABLED_LANGUAGES,
+            format_func=lambda lang: get_text(lang)["_language"]
+        )
 
-        if st.button("Continue / आगे बढ़ें", use_container_width=True):
+        if st.button(" / ".join(text["continue"] for text in catalogs), use_container_width=True):
             st.session_state.language = language
             st.session_state.step = "personal"
             st.rerun()
@@ -109,11 +75,7 @@ def patient_form():
 
         if st.button(T["proceed"], use_container_width=True):
             if not name or not mobile_valid:
-                st.error(
-                    "Please enter valid details"
-                    if st.session_state.language == "English"
-                    else "कृपया सही जानकारी भरें"
-                )
+                st.error(T["invalid_details"])
             else:
                 st.session_state.name = name
                 st.session_state.mobile = mobile
@@ -136,15 +98,12 @@ def patient_form():
             <div class="section-title">🧍 {T['health_form']}</div>
         """, unsafe_allow_html=True)
 
+        # Not shown: a returning patient is stored under their existing
+        # ID by insert_patient_record, and the intake screen must not
+        # reveal whether a name and mobile are already registered
         if "patient_id" not in st.session_state:
             st.session_state.patient_id = generate_patient_id()
 
-        st.text_input(
-            T["patient_id"],
-            value=st.session_state.patient_id,
-            disabled=True
-        )
-
         st.markdown("</div>", unsafe_allow_html=True)
 
         # -----------------------------
@@ -157,7 +116,10 @@ def patient_form():
 
         col1, col2 = st.columns(2)
         with col1:
-            gender = st.radio(T["gender"], ["Male", "Female"], horizontal=True)
+            gender = st.radio(
+                T["gender"], ["Male", "Female"],
+                format_func=lambda g: T[f"gender_{g}"], horizontal=True
+            )
         with col2:
             age = st.slider(T["age"], 18, 90, 35)
 
@@ -173,15 +135,19 @@ def patient_form():
 
         col3, col4 = st.columns(2)
         with col3:
-            hypertension_ui = st.radio(T["hypertension"], ["No", "Yes"], horizontal=True)
+            hypertension_ui = st.radio(
+                T["hypertension"], ["no", "yes"], format_func=T.get, horizontal=True
+            )
         with col4:
-            heart_disease_ui = st.radio(T["heart_disease"], ["No", "Yes"], horizontal=True)
+            heart_disease_ui = st.radio(
+                T["heart_disease"], ["no", "yes"], format_func=T.get, horizontal=True
+            )
 
-        smoking_ui = st.selectbox(
+        # Canonical values in every language; only the labels are translated
+        smoking = st.selectbox(
             T["smoking"],
-            ["Never", "Former", "Occasional", "Current"]
-            if st.session_state.language == "English"
-            else ["कभी नहीं", "पहले करता था", "कभी-कभी", "वर्तमान"]
+            ["never", "former", "occasional", "current"],
+            format_func=lambda v: T[f"smoking_{v}"]
         )
 
         st.markdown("</div>", unsafe_allow_html=True)
@@ -194,9 +160,9 @@ def patient_form():
             <div class="section-title">🧪 {T['clinical']}</div>
         """, unsafe_allow_html=True)
 
-        bmi = st.slider("BMI", 10.0, 50.0, 25.0)
-        hba1c = st.slider("HbA1c (%)", 4.0, 15.0, 5.6)
-        glucose = st.slider("Blood Glucose (mg/dL)", 70, 300, 120)
+        bmi = st.slider(T["bmi"], 10.0, 50.0, 25.0)
+        hba1c = st.slider(T["hba1c"], 4.0, 15.0, 5.6)
+        glucose = st.slider(T["glucose"], 70, 300, 120)
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -208,56 +174,55 @@ def patient_form():
             patient_data = {
                 "gender": gender,
                 "age": age,
-                "hypertension": 1 if hypertension_ui == "Yes" else 0,
-                "heart_disease": 1 if heart_disease_ui == "Yes" else 0,
-                "smoking_history": smoking_ui.lower(),
+                "hypertension": 1 if hypertension_ui == "yes" else 0,
+                "heart_disease": 1 if heart_disease_ui == "yes" else 0,
+                "smoking_history": smoking,
                 "bmi": bmi,
                 "HbA1c_level": hba1c,
                 "blood_glucose_level": glucose
             }
 
-            prob, risk, _, _ = compute_risk(patient_data)
-            risk_ui = get_risk_ui(prob)
+            # One model snapshot for the whole submission (hot reload safe)
+            model_bundle = current_model()
+            prob, risk, _, _ = compute_risk(patient_data, model_bundle)
+            risk_ui = SEVERITY_BANDS.band(prob)
 
             # -----------------------------
             # SAVE TO DATABASE
             # -----------------------------
-            conn = get_connection()
-            cur = conn.cursor()
-            cur.execute("""
-            INSERT INTO patient_records
-            (patient_id, name, mobile, language, gender, age,
-             hypertension, heart_disease, smoking_history,
-             bmi, hba1c, glucose, risk_probability, risk_category)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                st.session_state.patient_id,
-                st.session_state.name,
-                st.session_state.mobile,
-                st.session_state.language,
-                gender,
-                age,
-                patient_data["hypertension"],
-                patient_data["heart_disease"],
-                patient_data["smoking_history"],
-                bmi,
-                hba1c,
-                glucose,
-                round(prob, 3),
-                risk
-            ))
-            conn.commit()
-            conn.close()
+            insert_patient_record({
+                "patient_id": st.session_state.patient_id,
+                "name": st.session_state.name,
+                "mobile": st.session_state.mobile,
+                "language": st.session_state.language,
+                "gender": gender,
+                "age": age,
+                "hypertension": patient_data["hypertension"],
+                "heart_disease": patient_data["heart_disease"],
+                "smoking_history": patient_data["smoking_history"],
+                "bmi": bmi,
+                "hba1c": hba1c,
+                "glucose": glucose,
+                "risk_probability": round(prob, 3),
+                "risk_category": risk,
+                "model_version": model_bundle.version,
+            })
+
+            # Rising-risk worklist: only this visit is evaluated
+            update_alerts()
+
+            # Streaming drift counts against the training reference
+            drift.observe(patient_data)
 
             # -----------------------------
             # RESULT UI
             # -----------------------------
             st.markdown(f"""
             <div class="card" style="border-left:6px solid {risk_ui['color']}">
-                <h2>{risk_ui['emoji']} {risk_ui['label']}</h2>
+                <h2>{risk_ui['emoji']} {T[f"severity_label_{risk_ui['level']}"]}</h2>
                 <p><b>{T['risk_result']}:</b> {prob*100:.2f}%</p>
-                <p><b>Urgency:</b> {risk_ui['urgency']}</p>
-                <p>{risk_ui['message']}</p>
+                <p><b>{T['urgency']}:</b> {T[f"urgency_{risk_ui['urgency']}"]}</p>
+                <p>{T[f"severity_message_{risk_ui['level']}"]}</p>
             </div>
             """, unsafe_allow_html=True)
 
@@ -279,11 +244,7 @@ def patient_form():
                     )
                 )
             except Exception:
-                st.info(
-                    "AI explanation temporarily unavailable. Please consult a doctor."
-                    if st.session_state.language == "English"
-                    else "AI जानकारी उपलब्ध नहीं है। कृपया डॉक्टर से सलाह लें।"
-                )
+                st.info(T["ai_unavailable"])
 
             st.markdown("</div>", unsafe_allow_html=True)
 
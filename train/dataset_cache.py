@@ -0,0 +1,77 @@
+"""
+Preprocessed dataset cache
+
+Stores the encoded feature matrix and labels as .npy files, keyed by
+the source CSV's SHA-256 and the encoder version. Later runs load
+them memory-mapped instead of re-parsing and re-encoding the CSV.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _save_npy(path, array):
+    # Write then rename, so a crashed run never leaves a half file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def load_encoded(csv_path, encode, target_col, version, cache_dir=CACHE_DIR):
+    """
+    Returns (X, y, feature_names) for csv_path.
+
+    encode: callable(DataFrame) -> encoded feature DataFrame
+    version: encoder version string; bump it whenever encode changes
+
+    X and y are read-only memory-mapped arrays.
+    """
+    key = f"{file_hash(csv_path)[:16]}-{version}"
+    entry = os.path.join(cache_dir, key)
+
+    x_path = os.path.join(entry, "X.npy")
+    y_path = os.path.join(entry, "y.npy")
+    meta_path = os.path.join(entry, "meta.json")
+
+    if not os.path.exists(meta_path):
+        df = pd.read_csv(csv_path).dropna()
+        X = encode(df)
+
+        os.makedirs(entry, exist_ok=True)
+        _save_npy(x_path, X.to_numpy(dtype=np.float64))
+        _save_npy(y_path, df[target_col].to_numpy())
+
+        # Metadata last: its presence marks a complete entry
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({
+                "source": os.path.abspath(csv_path),
+                "version": version,
+                "rows": len(df),
+                "feature_names": X.columns.tolist(),
+            }, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        print(f"💾 Cached encoded dataset at {entry}")
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+
+    return X, y, meta["feature_names"]
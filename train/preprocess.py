@@ -1,21 +1,23 @@
-import pandas as pd
+import os
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
-TARGET_COL = "diabetes"
+# Allow running from train/ to import the shared src package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def load_and_preprocess(csv_path):
-    df = pd.read_csv(csv_path)
+from src.core.feature_encoder import DEFAULT_ENCODER, ENCODER_VERSION
+from dataset_cache import load_encoded
 
-    # Drop missing values
-    df = df.dropna()
+TARGET_COL = "diabetes"
 
-    # Separate target
-    y = df[TARGET_COL]
-    X = df.drop(TARGET_COL, axis=1)
 
-    # One-hot encode categorical columns
-    X = pd.get_dummies(X, columns=["gender", "smoking_history"], drop_first=True)
+def load_and_preprocess(csv_path):
+    # Parsed, NaN-free and encoded once (same encoder as serving);
+    # memory-mapped afterwards
+    X, y, feature_names = load_encoded(
+        csv_path, DEFAULT_ENCODER.transform_frame, TARGET_COL, ENCODER_VERSION
+    )
 
     # Scale numerical features
     scaler = StandardScaler()
@@ -25,4 +27,4 @@ def load_and_preprocess(csv_path):
         X_scaled, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    return X_train, X_test, y_train, y_test, scaler, X.columns.tolist()
+    return X_train, X_test, y_train, y_test, scaler, feature_names
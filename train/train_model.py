@@ -1,41 +1,322 @@
-import pandas as pd
+import argparse
+import hashlib
+import os
 import pickle
-from sklearn.model_selection import train_test_split
+import sys
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import roc_auc_score
 
+# Allow `python train_model.py` from train/ to import the shared src package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.feature_encoder import DEFAULT_ENCODER, ENCODER_VERSION
+from src.core.drift import reference_path, save_reference
+from src.core.mapped_model import export_weights, mapped_path
+from dataset_cache import load_encoded
+
 DATA_PATH = "../data/diabetes_dataset.csv"
 MODEL_PATH = "model.pkl"
 
-df = pd.read_csv(DATA_PATH)
-
 TARGET_COL = "diabetes"
 
-X = df.drop(columns=[TARGET_COL])
-y = df[TARGET_COL]
+# Fixed category vocabulary, shared with serving. Streaming chunks
+# may not contain every category, so the columns must not depend
+# on the data seen.
+ENCODER = DEFAULT_ENCODER
+FEATURE_NAMES = ENCODER.feature_names
+
+VALIDATION_FRACTION = 0.2
+AUC_BINS = 10_000
+
+LEADERBOARD_PATH = "leaderboard.csv"
+
+# Hyperparameter search space
+SEARCH_CS = [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]
+# Penalty chosen by l1_ratio alone (0 = L2, 1 = L1): scikit-learn >= 1.8
+# semantics, hence the pin in requirements.txt; `penalty` is deprecated
+SEARCH_PENALTIES = {"l2": 0.0, "l1": 1.0, "elasticnet": 0.5}
+SEARCH_CLASS_WEIGHTS = [None, "balanced"]
+
+
+def save_model(model, scaler, feature_names, model_path=MODEL_PATH, data_path=DATA_PATH):
+    # 🔥 SAVE EVERYTHING TOGETHER (encoder travels with the model)
+    # Written to a temp file and renamed, so running app workers
+    # hot-reloading the artifact never see a half-written model
+    data = pickle.dumps((model, scaler, feature_names, ENCODER))
+
+    tmp_path = model_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, model_path)
+
+    print(f"✅ Model saved correctly at {model_path}")
+
+    # Shared memory-mapped weights for CDS_MODEL_FORMAT=mapped workers
+    version = hashlib.sha256(data).hexdigest()[:12]
+    weights_path = export_weights(
+        model, scaler, feature_names, ENCODER, version, mapped_path(model_path)
+    )
+    print(f"✅ Mapped weights saved at {weights_path}")
+
+    # Training distribution the live drift monitor compares against
+    ref_path = save_reference(data_path, reference_path(model_path))
+    print(f"✅ Drift reference saved at {ref_path}")
+
+
+# =====================================================
+# ENCODING & DATASET CACHE
+# =====================================================
+def encode_chunk(chunk):
+    """
+    One-hot encode a chunk against the fixed vocabulary
+    """
+    return ENCODER.transform_frame(chunk)
+
+
+def load_dataset(data_path=DATA_PATH):
+    """
+    Encoded (X, y, feature_names) from the binary cache,
+    building it from the CSV on first use
+    """
+    return load_encoded(data_path, encode_chunk, TARGET_COL, ENCODER_VERSION)
+
+
+# =====================================================
+# BATCH TRAINING (FULL DATASET IN MEMORY)
+# =====================================================
+def train_batch(data_path=DATA_PATH, model_path=MODEL_PATH):
+    X, y, feature_names = load_dataset(data_path)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(pd.DataFrame(X_train, columns=feature_names))
+    X_test_scaled = scaler.transform(pd.DataFrame(X_test, columns=feature_names))
+
+    model = LogisticRegression(max_iter=1000)
+    model.fit(X_train_scaled, y_train)
+
+    y_prob = model.predict_proba(X_test_scaled)[:, 1]
+    print("ROC-AUC:", roc_auc_score(y_test, y_prob))
+
+    save_model(model, scaler, feature_names, model_path, data_path)
+
+
+# =====================================================
+# INCREMENTAL TRAINING (STREAMED IN CHUNKS)
+# =====================================================
+def _iter_chunks(data_path, chunksize, seed=42):
+    """
+    Yields (X_train, y_train, X_val, y_val) per chunk.
+    The validation split is drawn per chunk from a seeded
+    generator, so every pass over the file sees the same split.
+    """
+    rng = np.random.default_rng(seed)
+
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        chunk = chunk.dropna()
+
+        X = encode_chunk(chunk)
+        y = chunk[TARGET_COL].to_numpy()
+
+        is_val = rng.random(len(chunk)) < VALIDATION_FRACTION
+        order = rng.permutation(int((~is_val).sum()))
+
+        yield (
+            X[~is_val].iloc[order], y[~is_val][order],
+            X[is_val], y[is_val]
+        )
+
+
+def _binned_auc(pos_counts, neg_counts):
+    """
+    ROC-AUC from probability histograms (constant memory).
+    Ties inside a bin count as half, as in the exact statistic.
+    """
+    neg_below = np.cumsum(neg_counts) - neg_counts
+    wins = np.sum(pos_counts * (neg_below + 0.5 * neg_counts))
+    return wins / (pos_counts.sum() * neg_counts.sum())
+
+
+def train_incremental(data_path=DATA_PATH, model_path=MODEL_PATH,
+                      chunksize=100_000, epochs=3):
+    # -----------------------------
+    # PASS 1: SCALER STATISTICS
+    # -----------------------------
+    scaler = StandardScaler()
+    for X_train, _, _, _ in _iter_chunks(data_path, chunksize):
+        if len(X_train):
+            scaler.partial_fit(X_train)
+
+    # -----------------------------
+    # PASS 2..N: SGD LOGISTIC REGRESSION
+    # -----------------------------
+    model = SGDClassifier(loss="log_loss", average=True, random_state=42)
+    classes = np.array([0, 1])
+
+    for epoch in range(epochs):
+        for X_train, y_train, _, _ in _iter_chunks(data_path, chunksize):
+            if len(X_train):
+                model.partial_fit(scaler.transform(X_train), y_train, classes=classes)
+        print(f"Epoch {epoch + 1}/{epochs} done")
+
+    # -----------------------------
+    # VALIDATION (STREAMED)
+    # -----------------------------
+    pos_counts = np.zeros(AUC_BINS)
+    neg_counts = np.zeros(AUC_BINS)
+
+    for _, _, X_val, y_val in _iter_chunks(data_path, chunksize):
+        if not len(X_val):
+            continue
+        y_prob = model.predict_proba(scaler.transform(X_val))[:, 1]
+        bins = np.minimum((y_prob * AUC_BINS).astype(int), AUC_BINS - 1)
+        pos_counts += np.bincount(bins[y_val == 1], minlength=AUC_BINS)
+        neg_counts += np.bincount(bins[y_val == 0], minlength=AUC_BINS)
+
+    print("ROC-AUC:", _binned_auc(pos_counts, neg_counts))
+
+    save_model(model, scaler, FEATURE_NAMES, model_path, data_path)
+
+
+# =====================================================
+# CROSS-VALIDATED HYPERPARAMETER SEARCH
+# =====================================================
+def _fit_path(X, y, train_idx, test_idx, l1_ratio, class_weight):
+    """
+    Fit one fold along the whole C grid.
+    Cs are visited from strongest to weakest regularization and each
+    fit warm-starts from the previous coefficients.
+    """
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+
+    model = LogisticRegression(
+        solver="saga",
+        l1_ratio=l1_ratio,
+        class_weight=class_weight,
+        warm_start=True,
+        max_iter=1000,
+    )
+
+    scores = []
+    for C in sorted(SEARCH_CS):
+        model.set_params(C=C)
+        model.fit(X_train, y[train_idx])
+        y_prob = model.predict_proba(X_test)[:, 1]
+        scores.append((C, roc_auc_score(y[test_idx], y_prob)))
+
+    return scores
+
+
+def train_search(data_path=DATA_PATH, model_path=MODEL_PATH,
+                 folds=5, n_jobs=-1, leaderboard_path=LEADERBOARD_PATH):
+    X, y, feature_names = load_dataset(data_path)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    splits = list(cv.split(X_train, y_train))
+
+    grid = [
+        (penalty, l1_ratio, class_weight)
+        for penalty, l1_ratio in SEARCH_PENALTIES.items()
+        for class_weight in SEARCH_CLASS_WEIGHTS
+    ]
+
+    # One task per (penalty, class weight, fold), spread over all cores
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_path)(X_train, y_train, train_idx, test_idx, l1_ratio, class_weight)
+        for _, l1_ratio, class_weight in grid
+        for train_idx, test_idx in splits
+    )
+
+    rows = []
+    for i, (penalty, l1_ratio, class_weight) in enumerate(grid):
+        for fold, scores in enumerate(results[i * folds:(i + 1) * folds]):
+            for C, auc in scores:
+                rows.append({
+                    "penalty": penalty,
+                    "l1_ratio": l1_ratio,
+                    "class_weight": class_weight or "none",
+                    "C": C,
+                    "fold": fold,
+                    "roc_auc": auc,
+                })
+
+    leaderboard = (
+        pd.DataFrame(rows)
+        .groupby(["penalty", "l1_ratio", "class_weight", "C"], as_index=False)["roc_auc"]
+        .agg(mean_roc_auc="mean", std_roc_auc="std")
+        .sort_values("mean_roc_auc", ascending=False)
+        .reset_index(drop=True)
+    )
+    leaderboard.to_csv(leaderboard_path, index=False)
+    print(leaderboard.head(10).to_string())
+    print(f"📋 Leaderboard written to {leaderboard_path}")
+
+    # -----------------------------
+    # REFIT BEST ON FULL TRAIN SPLIT
+    # -----------------------------
+    best = leaderboard.iloc[0]
+    class_weight = None if best["class_weight"] == "none" else best["class_weight"]
+
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(pd.DataFrame(X_train, columns=feature_names))
+    X_test_scaled = scaler.transform(pd.DataFrame(X_test, columns=feature_names))
+
+    model = LogisticRegression(
+        solver="saga",
+        C=float(best["C"]),
+        l1_ratio=float(best["l1_ratio"]),
+        class_weight=class_weight,
+        max_iter=1000,
+    )
+    model.fit(X_train_scaled, y_train)
+
+    y_prob = model.predict_proba(X_test_scaled)[:, 1]
+    print("Best params:", best[["penalty", "class_weight", "C"]].to_dict())
+    print("Held-out ROC-AUC:", roc_auc_score(y_test, y_prob))
 
-# One-hot encoding
-X_encoded = pd.get_dummies(X)
+    save_model(model, scaler, feature_names, model_path, data_path)
 
-feature_names = X_encoded.columns.tolist()
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X_encoded, y, test_size=0.2, random_state=42
-)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the diabetes risk model")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--out", default=MODEL_PATH)
 
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+    sub = parser.add_subparsers(dest="mode")
+    sub.add_parser("batch", help="Fit on the full dataset in memory (default)")
 
-model = LogisticRegression(max_iter=1000)
-model.fit(X_train_scaled, y_train)
+    incremental = sub.add_parser(
+        "incremental", help="Stream the CSV in chunks (out-of-core)"
+    )
+    incremental.add_argument("--chunksize", type=int, default=100_000)
+    incremental.add_argument("--epochs", type=int, default=3)
 
-y_prob = model.predict_proba(X_test_scaled)[:, 1]
-print("ROC-AUC:", roc_auc_score(y_test, y_prob))
+    search = sub.add_parser(
+        "search", help="Stratified k-fold hyperparameter search"
+    )
+    search.add_argument("--folds", type=int, default=5)
+    search.add_argument("--jobs", type=int, default=-1)
+    search.add_argument("--leaderboard", default=LEADERBOARD_PATH)
 
-# 🔥 SAVE EVERYTHING TOGETHER
-with open(MODEL_PATH, "wb") as f:
-    pickle.dump((model, scaler, feature_names), f)
+    args = parser.parse_args()
 
-print("✅ Model saved correctly at train/model.pkl")
+    if args.mode == "incremental":
+        train_incremental(args.data, args.out, args.chunksize, args.epochs)
+    elif args.mode == "search":
+        train_search(args.data, args.out, args.folds, args.jobs, args.leaderboard)
+    else:
+        train_batch(args.data, args.out)